@@ -1,11 +1,184 @@
 import pandas as pd
 import os
+import io
+import re
+import csv
 import logging
+from contextlib import contextmanager
 from sqlalchemy import text
-from app.database import engine, DATA_DIR
+from app.database import engine, DATA_DIR, DB_TYPE, crear_columna_fecha_ventas, crear_indices_ventas
+from app.utils.cache import invalidate_caches
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pyarrow es opcional
+    pa = None
+    pacsv = None
 
 logger = logging.getLogger(__name__)
 
+# Lector de CSV: "pandas" (por defecto) o "pyarrow" (multihilo, requiere pyarrow)
+MOTOR_LECTURA_CSV = os.getenv("CSV_ENGINE", "pandas").strip().lower()
+
+# Filas por bloque al leer los CSV (acota la memoria en archivos grandes)
+CHUNKSIZE_LECTURA = 50_000
+
+# Caracteres no permitidos en nombres de columna
+_CARACTERES_NO_PERMITIDOS = re.compile(r"[^a-z0-9_]")
+
+# Prefijos de columnas de texto: códigos (c_barra), descripciones (d_marca,
+# d_almacen, d_color_proveedor...) y fechas (f_sistema). Se leen siempre como
+# texto: si el tipo se infiriera por bloque, un bloque solo con dígitos
+# convertiría los códigos en enteros y perdería los ceros a la izquierda.
+_PREFIJOS_TEXTO = ("c_", "d_", "f_")
+
+
+def _normalizar_columnas(columnas):
+    """Normaliza nombres de columnas: minusculas, espacios a '_' y solo [a-z0-9_]."""
+    return [
+        _CARACTERES_NO_PERMITIDOS.sub("", col.strip().lower().replace(" ", "_"))
+        for col in columnas
+    ]
+
+
+def _leer_encabezado(archivo_path):
+    """
+    Lee solo la fila de encabezado y define el esquema de carga.
+
+    Returns:
+        (indices, nombres, originales): posiciones de las columnas a cargar
+        (sin las "Unnamed" que genera un separador sobrante), sus nombres ya
+        normalizados y los nombres tal como vienen en el archivo.
+    """
+    columnas = pd.read_csv(archivo_path, encoding="latin1", sep=";", nrows=0).columns
+    indices = [i for i, col in enumerate(columnas) if not col.startswith("Unnamed")]
+    originales = [columnas[i] for i in indices]
+    nombres = _normalizar_columnas(originales)
+    return indices, nombres, originales
+
+
+def _es_columna_texto(nombre):
+    """Indica si la columna (nombre normalizado) se carga siempre como texto."""
+    return nombre.startswith(_PREFIJOS_TEXTO)
+
+
+def _leer_csv_pandas(archivo_path, indices, nombres, originales):
+    """Lee el CSV en bloques con el parser C de pandas."""
+    # Las columnas descartadas no se parsean y los nombres llegan ya normalizados.
+    # Las de texto tienen tipo fijo para que todos los bloques coincidan.
+    return pd.read_csv(
+        archivo_path,
+        encoding="latin1",
+        sep=";",
+        engine="c",
+        header=0,
+        names=nombres,
+        usecols=indices,
+        dtype={n: str for n in nombres if _es_columna_texto(n)},
+        chunksize=CHUNKSIZE_LECTURA,
+    )
+
+
+def _leer_csv_pyarrow(archivo_path, indices, nombres, originales):
+    """
+    Lee el CSV completo con el lector multihilo de PyArrow y lo entrega en
+    bloques de CHUNKSIZE_LECTURA filas ya convertidos a DataFrame.
+    """
+    # column_types usa los nombres del archivo (antes de renombrar)
+    tipos_texto = {
+        original: pa.string()
+        for original, nombre in zip(originales, nombres)
+        if _es_columna_texto(nombre)
+    }
+    tabla = pacsv.read_csv(
+        archivo_path,
+        read_options=pacsv.ReadOptions(encoding="latin1", block_size=64 << 20),
+        parse_options=pacsv.ParseOptions(delimiter=";"),
+        # Celdas vacias como NULL, igual que pandas
+        convert_options=pacsv.ConvertOptions(
+            strings_can_be_null=True, column_types=tipos_texto
+        ),
+    )
+    tabla = tabla.select(indices).rename_columns(nombres)
+
+    for inicio in range(0, max(tabla.num_rows, 1), CHUNKSIZE_LECTURA):
+        yield tabla.slice(inicio, CHUNKSIZE_LECTURA).to_pandas()
+
+
+def _leer_csv_en_bloques(archivo_path):
+    """Devuelve un iterador de DataFrames segun MOTOR_LECTURA_CSV."""
+    esquema = _leer_encabezado(archivo_path)
+    if MOTOR_LECTURA_CSV == "pyarrow":
+        if pacsv is None:
+            raise ImportError("CSV_ENGINE=pyarrow requiere instalar pyarrow")
+        return _leer_csv_pyarrow(archivo_path, *esquema)
+    return _leer_csv_pandas(archivo_path, *esquema)
+
+
+def _pg_copy(table, conn, keys, data_iter):
+    """
+    Metodo de insercion para to_sql en PostgreSQL usando COPY FROM STDIN.
+
+    Vuelca las filas a un CSV en memoria y las envia en una sola sentencia,
+    evitando el parseo de INSERT fila a fila.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(data_iter)
+    buffer.seek(0)
+
+    nombre_tabla = f"{table.schema}.{table.name}" if table.schema else table.name
+    columnas = ", ".join(keys)
+
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {nombre_tabla} ({columnas}) FROM STDIN WITH CSV", buffer
+        )
+
+
+def _opciones_insercion():
+    """
+    Parametros de to_sql segun el motor de BD.
+
+    En PostgreSQL se usa COPY (ver _pg_copy). En SQLite el executemany por
+    defecto del driver ya es mas rapido que compilar INSERT multi-fila, por
+    eso se deja igual.
+    """
+    if DB_TYPE == "postgresql":
+        return {"method": _pg_copy}
+    return {}
+
+
+@contextmanager
+def _pragmas_carga_sqlite():
+    """
+    Relaja la durabilidad de SQLite mientras dura la carga masiva.
+
+    Las tablas _raw se pueden regenerar desde los CSV, asi que no hace
+    falta sincronizar a disco cada pagina. Al terminar se restauran los
+    valores que tenia la conexion.
+    """
+    if DB_TYPE != "sqlite":
+        yield
+        return
+
+    with engine.connect() as conn:
+        synchronous_previo = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+        journal_previo = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+        temp_store_previo = conn.exec_driver_sql("PRAGMA temp_store").scalar()
+
+        conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        conn.exec_driver_sql("PRAGMA journal_mode = MEMORY")
+        conn.exec_driver_sql("PRAGMA temp_store = MEMORY")
+
+    try:
+        yield
+    finally:
+        with engine.connect() as conn:
+            conn.exec_driver_sql(f"PRAGMA synchronous = {int(synchronous_previo)}")
+            conn.exec_driver_sql(f"PRAGMA journal_mode = {journal_previo}")
+            conn.exec_driver_sql(f"PRAGMA temp_store = {int(temp_store_previo)}")
+
 
 def resetear_y_cargar():
     inputs_dir = os.path.join(DATA_DIR, "inputs")
@@ -18,39 +191,50 @@ def resetear_y_cargar():
 
     tablas_raw = list(archivos.keys())
 
-    with engine.begin() as conn:  # begin() = auto-commit al salir sin error
+    # Todo el reseteo va en una sola transaccion: si algo falla, las tablas
+    # anteriores quedan intactas y solo hay un commit al final.
+    with _pragmas_carga_sqlite(), engine.begin() as conn:
+        if DB_TYPE == "sqlite":
+            # El driver de SQLite no abre transaccion antes de DDL (DROP/CREATE);
+            # se abre explicitamente para que el reseteo completo sea atomico.
+            conn.exec_driver_sql("BEGIN EXCLUSIVE")
+
         # Paso 1: eliminar tablas _raw
         for tabla in tablas_raw:
             logger.info(f"Eliminando tabla {tabla} si existe...")
             conn.execute(text(f"DROP TABLE IF EXISTS {tabla}"))
         logger.info("Tablas RAW eliminadas.")
 
-    # Paso 2: cargar cada CSV y recrear la tabla
-    for tabla, archivo_path in archivos.items():
-        if not os.path.exists(archivo_path):
-            logger.error(f"Archivo no encontrado: {archivo_path}")
-            raise FileNotFoundError(f"No se encontro el archivo: {archivo_path}")
+        # Paso 2: cargar cada CSV y recrear la tabla
+        for tabla, archivo_path in archivos.items():
+            if not os.path.exists(archivo_path):
+                logger.error(f"Archivo no encontrado: {archivo_path}")
+                raise FileNotFoundError(f"No se encontro el archivo: {archivo_path}")
 
-        logger.info(f"Cargando {os.path.basename(archivo_path)} -> {tabla} ...")
+            logger.info(f"Cargando {os.path.basename(archivo_path)} -> {tabla} ...")
 
-        df = pd.read_csv(archivo_path, encoding="latin1", sep=";")
+            lector = _leer_csv_en_bloques(archivo_path)
 
-        # Limpiar columnas "Unnamed"
-        df = df.loc[:, ~df.columns.str.contains("^Unnamed")]
+            total_filas = 0
 
-        # Normalizar nombres de columnas
-        df.columns = (
-            df.columns
-            .str.strip()
-            .str.lower()
-            .str.replace(" ", "_")
-            .str.replace(r"[^a-z0-9_]", "", regex=True)
-        )
+            for i, df in enumerate(lector):
+                # Guardar en BD dentro de la transaccion abierta
+                df.to_sql(
+                    tabla,
+                    conn,
+                    if_exists="replace" if i == 0 else "append",
+                    index=False,
+                    **_opciones_insercion(),
+                )
+                total_filas += len(df)
+
+            logger.info(f"{total_filas} filas insertadas en {tabla}")
 
-        # Guardar en BD via SQLAlchemy (usa el engine compartido)
-        df.to_sql(tabla, engine, if_exists="replace", index=False)
-        logger.info(f"{len(df)} filas insertadas en {tabla}")
+        # Paso 3: fecha de venta precalculada e indexada
+        crear_columna_fecha_ventas(conn)
+        crear_indices_ventas(conn)
 
+    invalidate_caches()
     logger.info(f"Tablas RAW recreadas exitosamente.")
 
 
@@ -2,8 +2,11 @@
 
 import os
 import sys
+import pickle
+import hashlib
+from functools import lru_cache
 from pathlib import Path
-from typing import Literal, Optional
+from typing import Literal, Optional, get_args
 from pydantic import BaseModel, Field, field_validator, model_validator
 from dotenv import load_dotenv
 
@@ -14,6 +17,19 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 env_path = BASE_DIR / ".env"
 env_loaded = load_dotenv(env_path)
 
+# Caché en disco de la configuración ya validada
+SETTINGS_CACHE_FILE = Path.home() / ".cache" / "jagi" / "settings.pkl"
+
+# Variables de entorno que determinan la configuración
+SETTINGS_ENV_VARS = (
+    "DEBUG", "LOG_LEVEL", "ENVIRONMENT",
+    "DB_TYPE", "DB_PATH", "DB_HOST", "DB_PORT", "DB_NAME", "DB_USER", "DB_PASSWORD",
+)
+
+# Campos secretos de DatabaseConfig y su variable de entorno: nunca se
+# escriben en la caché en disco, se leen del entorno al cargarla
+SETTINGS_SECRET_FIELDS = {"password": "DB_PASSWORD"}
+
 
 class DatabaseConfig(BaseModel):
     """
@@ -195,6 +211,111 @@ class Settings(BaseModel):
         extra = "ignore"
 
 
+def _check_literal(model: type[BaseModel], field: str, value) -> None:
+    """Verifica que el valor esté entre los permitidos por un campo Literal."""
+    allowed = get_args(model.model_fields[field].annotation)
+    if value not in allowed:
+        raise ValueError(
+            f"Valor inválido para {field}: '{value}'\n"
+            f"Valores permitidos: {', '.join(allowed)}"
+        )
+
+
+def _construct_settings(app_values: dict, database_values: dict) -> Settings:
+    """
+    Construye Settings sin pasar por la validación de Pydantic.
+    
+    Los valores ya vienen tipados desde load_settings(), así que solo se
+    ejecutan explícitamente las reglas de negocio de los validadores.
+    """
+    _check_literal(AppConfig, "log_level", app_values["log_level"])
+    _check_literal(AppConfig, "environment", app_values["environment"])
+    DatabaseConfig.validate_db_type(database_values["type"])
+
+    app = AppConfig.model_construct(**app_values)
+    database = DatabaseConfig.model_construct(**database_values)
+
+    app.validate_production_safety()
+    database.validate_postgresql_config()
+
+    return Settings.model_construct(app=app, database=database)
+
+
+def _settings_cache_key() -> str:
+    """
+    Clave de la caché: cambia si se modifica el .env, alguna variable de
+    entorno relevante o este mismo módulo. Los secretos no forman parte de
+    la clave (ni siquiera como hash): se validan de nuevo en cada carga.
+    """
+    secretos = set(SETTINGS_SECRET_FIELDS.values())
+    parts = []
+    for path in (env_path, Path(__file__)):
+        if path.exists():
+            stat = path.stat()
+            parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+    parts.extend(
+        f"{name}={os.getenv(name, '')}"
+        for name in SETTINGS_ENV_VARS
+        if name not in secretos
+    )
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _settings_disk_cache_enabled() -> bool:
+    """En producción la configuración no se persiste en disco."""
+    return os.getenv("ENVIRONMENT", "development").lower() != "production"
+
+
+def _read_cached_settings(key: str) -> Optional[Settings]:
+    """
+    Devuelve la configuración cacheada si la clave coincide, con los
+    secretos tomados del entorno actual y revalidados.
+    """
+    try:
+        with open(SETTINGS_CACHE_FILE, "rb") as f:
+            cached_key, cached_settings = pickle.load(f)
+    except Exception:
+        return None
+    
+    if cached_key != key or not isinstance(cached_settings, Settings):
+        return None
+
+    database = cached_settings.database.model_copy(update={
+        field: os.getenv(env_var) for field, env_var in SETTINGS_SECRET_FIELDS.items()
+    })
+    try:
+        database.validate_postgresql_config()
+    except ValueError:
+        # Se repite la carga completa, que informa el error
+        return None
+    return cached_settings.model_copy(update={"database": database})
+
+
+def _write_cached_settings(key: str, settings: Settings) -> None:
+    """
+    Guarda la configuración validada, sin secretos. Si falla, solo se
+    omite la caché.
+    """
+    database = settings.database.model_copy(
+        update=dict.fromkeys(SETTINGS_SECRET_FIELDS)
+    )
+    payload = settings.model_copy(update={"database": database})
+    try:
+        cache_dir = SETTINGS_CACHE_FILE.parent
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # mkdir no cambia los permisos de un directorio ya existente
+        os.chmod(cache_dir, 0o700)
+        tmp_path = SETTINGS_CACHE_FILE.with_suffix(".tmp")
+        # Solo lectura para el usuario
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((key, payload), f)
+        os.replace(tmp_path, SETTINGS_CACHE_FILE)
+    except OSError:
+        pass
+
+
+@lru_cache(maxsize=1)
 def load_settings() -> Settings:
     """
     Carga y valida la configuración completa del sistema.
@@ -207,6 +328,11 @@ def load_settings() -> Settings:
         
     Raises:
         SystemExit: Si la configuración es inválida o falta .env
+    
+    El resultado se cachea en memoria (lru_cache) y, salvo en producción,
+    en disco (SETTINGS_CACHE_FILE, sin los secretos), de modo que los
+    procesos siguientes no repiten la validación mientras no cambie la
+    configuración.
     """
     
     # Verificar que exista .env
@@ -225,26 +351,38 @@ def load_settings() -> Settings:
         print("="*60 + "\n")
         sys.exit(1)
     
+    use_disk_cache = _settings_disk_cache_enabled()
+    if use_disk_cache:
+        cache_key = _settings_cache_key()
+        cached_settings = _read_cached_settings(cache_key)
+        if cached_settings is not None:
+            return cached_settings
+    
     try:
         # Leer variables de entorno
-        settings = Settings(
-            app=AppConfig(
-                debug=os.getenv("DEBUG", "False").lower() in ("true", "1", "yes"),
-                log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
-                environment=os.getenv("ENVIRONMENT", "development").lower(),
-            ),
-            database=DatabaseConfig(
-                type=os.getenv("DB_TYPE", "").lower() or "sqlite",
-                path=os.getenv("DB_PATH", "data/jagi_mahalo.db"),
-                host=os.getenv("DB_HOST"),
-                port=int(os.getenv("DB_PORT", "0")) if os.getenv("DB_PORT") else None,
-                name=os.getenv("DB_NAME"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-            )
+        app_values = dict(
+            debug=os.getenv("DEBUG", "False").lower() in ("true", "1", "yes"),
+            log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
+            environment=os.getenv("ENVIRONMENT", "development").lower(),
         )
-        
-        return settings
+        database_values = dict(
+            type=os.getenv("DB_TYPE", "").lower() or "sqlite",
+            path=os.getenv("DB_PATH", "data/jagi_mahalo.db"),
+            host=os.getenv("DB_HOST"),
+            port=int(os.getenv("DB_PORT", "0")) if os.getenv("DB_PORT") else None,
+            name=os.getenv("DB_NAME"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+        )
+
+        # En modo debug se usa la validación completa de Pydantic
+        if app_values["debug"]:
+            settings = Settings(
+                app=AppConfig(**app_values),
+                database=DatabaseConfig(**database_values),
+            )
+        else:
+            settings = _construct_settings(app_values, database_values)
         
     except ValueError as e:
         print("\n" + "="*60)
@@ -256,6 +394,10 @@ def load_settings() -> Settings:
         print("\n📖 Consulta el archivo .env.example para ver ejemplos")
         print("="*60 + "\n")
         sys.exit(1)
+    
+    if use_disk_cache:
+        _write_cached_settings(cache_key, settings)
+    return settings
 
 
 # Singleton: Se carga UNA SOLA VEZ al importar
@@ -7,14 +7,16 @@ Soporta SQLite (desarrollo) y PostgreSQL (producción).
 Actualizado: Ahora usa sistema de logging profesional.
 """
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import StaticPool
+from functools import lru_cache
 import logging
 import os
 
 # Importar configuración validada
 from app.config import settings
+from app.utils.cache import register_cache
 
 # Obtener logger para este módulo
 logger = logging.getLogger(__name__)
@@ -60,6 +62,29 @@ else:  # SQLite
     )
     logger.info(f"📦 Conectado a SQLite: {DB_PATH}")
 
+    @event.listens_for(engine, "connect")
+    def _configurar_sqlite(dbapi_conn, _registro):
+        """
+        Ajustes por conexión: WAL (las lecturas no esperan a las escrituras)
+        con synchronous NORMAL, caché de páginas de 128 MB, tablas temporales
+        de GROUP BY/ORDER BY en memoria, lectura por mmap y hilos auxiliares
+        para los ordenamientos grandes.
+
+        Con StaticPool hay una sola conexión por proceso, así que get_connection()
+        reutiliza siempre la misma caché de páginas.
+        """
+        # Un solo script: SQLite lo recorre de una vez. Se ejecuta al abrir
+        # la conexión, antes de cualquier transacción (executescript hace
+        # COMMIT de la que hubiera abierta).
+        dbapi_conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            PRAGMA cache_size = -131072;
+            PRAGMA temp_store = MEMORY;
+            PRAGMA mmap_size = 1073741824;
+            PRAGMA threads = 4;
+        """)
+
 # Exportar para uso en otros módulos
 DB_NAME = settings.database.name or "jagi_mahalo.db"
 DATA_DIR = DATA_DIR if DB_TYPE == "sqlite" else None
@@ -68,9 +93,28 @@ DB_PATH = DB_PATH if DB_TYPE == "sqlite" else None
 # ==========================================
 # SESIONES Y BASE DECLARATIVA
 # ==========================================
+# Se crean bajo demanda: la app trabaja con conexiones raw (get_connection)
+# y la mayoría de procesos nunca abre una sesión ORM.
+
+@lru_cache(maxsize=1)
+def get_session_factory():
+    """Retorna el sessionmaker ligado al engine (se crea una sola vez)."""
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+@lru_cache(maxsize=1)
+def get_declarative_base():
+    """Retorna la base declarativa del ORM (se crea una sola vez)."""
+    return declarative_base()
+
+
+def __getattr__(name):
+    """Compatibilidad: SessionLocal y Base siguen disponibles como atributos."""
+    if name == "SessionLocal":
+        return get_session_factory()
+    if name == "Base":
+        return get_declarative_base()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ==========================================
 # FUNCIONES AUXILIARES
@@ -78,7 +122,7 @@ Base = declarative_base()
 
 def get_db():
     """Generador de sesiones para FastAPI dependency injection."""
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
@@ -137,8 +181,34 @@ def date_subtract_days(days: int) -> str:
         return f"DATE('now', '-{days} days')"
 
 
+def date_subtract_days_param() -> str:
+    """
+    Como date_subtract_days, pero con los días como parámetro posicional:
+    el texto de la consulta no cambia entre llamadas y el motor reutiliza
+    la sentencia preparada.
+    """
+    if DB_TYPE == "postgresql":
+        return "CURRENT_DATE - %s * INTERVAL '1 day'"
+    else:
+        return "DATE('now', '-' || ? || ' days')"
+
+
+def param_placeholders(n: int) -> str:
+    """Marcadores posicionales para una lista IN (...) de n valores."""
+    marcador = "%s" if DB_TYPE == "postgresql" else "?"
+    return ", ".join([marcador] * n)
+
+
 def date_format_convert(column: str, sqlite_format: str = "DD/MM/YYYY") -> str:
     """Convierte formato de fecha según el tipo de BD."""
+    # f_sistema ya convertida e indexada en ventas_historico_raw
+    if (
+        sqlite_format == "DD/MM/YYYY"
+        and column.split(".")[-1] == "f_sistema"
+        and fecha_ventas_disponible()
+    ):
+        return f"{column}_date"
+
     if DB_TYPE == "postgresql":
         pg_format = sqlite_format.replace("YYYY", "YYYY").replace("MM", "MM").replace("DD", "DD")
         return f"TO_DATE({column}, '{pg_format}')"
@@ -149,6 +219,99 @@ def date_format_convert(column: str, sqlite_format: str = "DD/MM/YYYY") -> str:
             return f"DATE({column})"
 
 
+# ==========================================
+# FECHA PRECALCULADA DE VENTAS HISTÓRICAS
+# ==========================================
+# ventas_historico_raw.f_sistema llega como texto DD/MM/YYYY. Convertirla en
+# cada consulta obliga a un full scan; se guarda como columna generada
+# (f_sistema_date) con índice para que los filtros por fecha usen rango.
+
+def crear_columna_fecha_ventas(conn):
+    """
+    Agrega f_sistema_date (columna generada + índice) a ventas_historico_raw.
+    
+    Se ejecuta dentro de un savepoint: si el motor no lo soporta o hay
+    fechas mal formadas, se descarta y las consultas siguen usando la
+    conversión en línea.
+    """
+    if DB_TYPE == "postgresql":
+        # TO_DATE no es IMMUTABLE; make_date sí se admite en columnas generadas
+        columna = (
+            "f_sistema_date DATE GENERATED ALWAYS AS (make_date("
+            "substr(f_sistema,7,4)::int, substr(f_sistema,4,2)::int, substr(f_sistema,1,2)::int"
+            ")) STORED"
+        )
+    else:
+        # SQLite solo permite agregar columnas generadas VIRTUAL; el índice
+        # guarda los valores calculados
+        columna = (
+            "f_sistema_date TEXT GENERATED ALWAYS AS ("
+            "DATE(substr(f_sistema,7,4)||'-'||substr(f_sistema,4,2)||'-'||substr(f_sistema,1,2))"
+            ") VIRTUAL"
+        )
+
+    try:
+        with conn.begin_nested():
+            conn.execute(text(f"ALTER TABLE ventas_historico_raw ADD COLUMN {columna}"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_ventas_historico_fecha "
+                "ON ventas_historico_raw (f_sistema_date)"
+            ))
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo crear f_sistema_date en ventas_historico_raw: {e}")
+        return False
+
+
+def crear_indices_ventas(conn):
+    """
+    Índices de apoyo a las consultas de ventas:
+
+    - c_barra en ventas_historico_raw: los joins con ventas_saldos_raw buscan
+      las ventas de cada código sin recorrer la tabla.
+    - d_marca en ventas_saldos_raw: las búsquedas por marca filtran sobre las
+      marcas distintas del índice y luego buscan las filas por igualdad.
+    - c_barra en ventas_saldos_raw e inventario_bodega_raw: el join
+      saldos → bodega del reabastecimiento y el stock por código del
+      análisis de marca buscan por código en vez de recorrer la tabla.
+    - raw_name en config_tiendas: todas las consultas de saldos y ventas
+      hacen LEFT JOIN por almacén contra esa columna. config_tiendas no se
+      recarga desde CSV, así que el índice solo se crea si la tabla existe.
+    """
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_ventas_historico_barra "
+        "ON ventas_historico_raw (c_barra)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_ventas_saldos_marca "
+        "ON ventas_saldos_raw (d_marca)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_ventas_saldos_barra "
+        "ON ventas_saldos_raw (c_barra)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_inventario_bodega_barra "
+        "ON inventario_bodega_raw (c_barra)"
+    ))
+    if inspect(conn).has_table("config_tiendas"):
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_config_tiendas_raw "
+            "ON config_tiendas (raw_name)"
+        ))
+
+
+@register_cache
+@lru_cache(maxsize=1)
+def fecha_ventas_disponible() -> bool:
+    """Indica si ventas_historico_raw tiene la columna f_sistema_date."""
+    try:
+        columnas = inspect(engine).get_columns("ventas_historico_raw")
+    except Exception:
+        return False
+    return any(col["name"] == "f_sistema_date" for col in columnas)
+
+
 def current_date() -> str:
     """Retorna SQL para fecha actual según BD."""
     if DB_TYPE == "postgresql":
@@ -160,5 +323,7 @@ def current_date() -> str:
 # INICIALIZACIÓN
 # ==========================================
 
-if __name__ != "__main__":
+# La prueba de conexión al importar es opcional (JAGI_TEST_CONN_ON_IMPORT=1):
+# cuesta un round-trip por proceso. El endpoint /health/database la cubre.
+if __name__ != "__main__" and os.getenv("JAGI_TEST_CONN_ON_IMPORT") == "1":
     test_connection()
\ No newline at end of file
@@ -15,7 +15,16 @@ Inspirado en:
 
 """
 
-from typing import Any, Optional, Dict
+import sys
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Optional, Dict, Mapping
+
+
+# Registro código -> clase. Lo llena BaseAppException.__init_subclass__ con
+# cada subclase que declara code_default; se expone en solo lectura.
+_EXCEPTIONS_REGISTRY: Dict[str, type] = {}
+_EXCEPTIONS_MAP: Mapping[str, type] = MappingProxyType(_EXCEPTIONS_REGISTRY)
 
 
 # ==========================================
@@ -28,7 +37,24 @@ class BaseAppException(Exception):
     
     Todas las excepciones personalizadas deben heredar de esta clase.
     Permite captura global y logging consistente.
+
+    Las subclases con un código propio lo declaran en ``code_default`` y
+    quedan registradas para get_exception_by_code().
     """
+
+    # Atributos en slots: el __dict__ de BaseException no llega a crearse
+    __slots__ = ("message", "code", "status_code", "details", "_payload")
+
+    code_default: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "code_default" in cls.__dict__:
+            _EXCEPTIONS_REGISTRY[cls.code_default] = cls
+            # Un código nuevo invalida lo ya cacheado por get_exception_by_code
+            lookup = globals().get("get_exception_by_code")
+            if lookup is not None:
+                lookup.cache_clear()
     
     def __init__(
         self,
@@ -45,19 +71,25 @@ class BaseAppException(Exception):
             details: Información adicional del error
         """
         self.message = message
-        self.code = code
+        # Los literales del módulo ya vienen internados; los códigos que
+        # llegan en tiempo de ejecución (logs, APIs) se internan aquí
+        self.code = sys.intern(code)
         self.status_code = status_code
         self.details = details or {}
         super().__init__(self.message)
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convierte la excepción a diccionario para respuestas API."""
-        return {
+
+        # Payload de respuesta armado una sola vez
+        self._payload = {
             "error": True,
             "code": self.code,
             "message": self.message,
             "details": self.details
         }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte la excepción a diccionario para respuestas API."""
+        # Copia superficial: el llamador puede modificarla sin tocar el payload
+        return self._payload.copy()
 
 
 # ==========================================
@@ -66,6 +98,8 @@ class BaseAppException(Exception):
 
 class DatabaseException(BaseAppException):
     """Excepción base para errores de base de datos."""
+
+    __slots__ = ()
     
     def __init__(
         self,
@@ -83,16 +117,24 @@ class DatabaseException(BaseAppException):
 
 class ConnectionError(DatabaseException):
     """Error al conectar con la base de datos."""
+
+    __slots__ = ()
+
+    code_default = "DB_CONNECTION_ERROR"
     
     def __init__(self, message: str = "No se pudo conectar a la base de datos"):
         super().__init__(
             message=message,
-            code="DB_CONNECTION_ERROR"
+            code=self.code_default
         )
 
 
 class QueryError(DatabaseException):
     """Error al ejecutar una consulta SQL."""
+
+    __slots__ = ()
+
+    code_default = "DB_QUERY_ERROR"
     
     def __init__(
         self,
@@ -100,26 +142,34 @@ class QueryError(DatabaseException):
         query: Optional[str] = None,
         params: Optional[Dict] = None
     ):
-        details = {}
-        if query:
-            details["query"] = query
-        if params:
-            details["params"] = params
+        # Sin datos extra no se arma el dict (la base pone {} por defecto)
+        if not query and not params:
+            details = None
+        else:
+            details = {}
+            if query:
+                details["query"] = query
+            if params:
+                details["params"] = params
         
         super().__init__(
             message=message,
-            code="DB_QUERY_ERROR",
+            code=self.code_default,
             details=details
         )
 
 
 class TransactionError(DatabaseException):
     """Error durante una transacción de base de datos."""
+
+    __slots__ = ()
+
+    code_default = "DB_TRANSACTION_ERROR"
     
     def __init__(self, message: str = "Error en transacción de base de datos"):
         super().__init__(
             message=message,
-            code="DB_TRANSACTION_ERROR"
+            code=self.code_default
         )
 
 
@@ -129,6 +179,8 @@ class TransactionError(DatabaseException):
 
 class ValidationException(BaseAppException):
     """Excepción base para errores de validación de datos."""
+
+    __slots__ = ()
     
     def __init__(
         self,
@@ -137,11 +189,15 @@ class ValidationException(BaseAppException):
         field: Optional[str] = None,
         value: Any = None
     ):
-        details = {}
-        if field:
-            details["field"] = field
-        if value is not None:
-            details["value"] = str(value)
+        # Sin datos extra no se arma el dict (la base pone {} por defecto)
+        if not field and value is None:
+            details = None
+        else:
+            details = {}
+            if field:
+                details["field"] = field
+            if value is not None:
+                details["value"] = str(value)
         
         super().__init__(
             message=message,
@@ -153,6 +209,10 @@ class ValidationException(BaseAppException):
 
 class InvalidDataError(ValidationException):
     """Datos inválidos o mal formateados."""
+
+    __slots__ = ()
+
+    code_default = "INVALID_DATA"
     
     def __init__(
         self,
@@ -162,7 +222,7 @@ class InvalidDataError(ValidationException):
     ):
         super().__init__(
             message=message,
-            code="INVALID_DATA",
+            code=self.code_default,
             field=field,
             value=value
         )
@@ -170,17 +230,25 @@ class InvalidDataError(ValidationException):
 
 class MissingFieldError(ValidationException):
     """Campo requerido faltante."""
+
+    __slots__ = ()
+
+    code_default = "MISSING_FIELD"
     
     def __init__(self, field: str):
         super().__init__(
             message=f"El campo '{field}' es requerido",
-            code="MISSING_FIELD",
+            code=self.code_default,
             field=field
         )
 
 
 class DuplicateEntryError(ValidationException):
     """Intento de crear entrada duplicada."""
+
+    __slots__ = ()
+
+    code_default = "DUPLICATE_ENTRY"
     
     def __init__(
         self,
@@ -190,7 +258,7 @@ class DuplicateEntryError(ValidationException):
     ):
         super().__init__(
             message=message,
-            code="DUPLICATE_ENTRY",
+            code=self.code_default,
             field=field,
             value=value
         )
@@ -202,6 +270,8 @@ class DuplicateEntryError(ValidationException):
 
 class BusinessLogicException(BaseAppException):
     """Excepción base para errores de lógica de negocio."""
+
+    __slots__ = ()
     
     def __init__(
         self,
@@ -219,17 +289,25 @@ class BusinessLogicException(BaseAppException):
 
 class ProductNotFoundError(BusinessLogicException):
     """Producto no encontrado en la base de datos."""
+
+    __slots__ = ()
+
+    code_default = "PRODUCT_NOT_FOUND"
     
     def __init__(self, product_id: Any):
         super().__init__(
             message=f"Producto '{product_id}' no encontrado",
-            code="PRODUCT_NOT_FOUND",
+            code=self.code_default,
             details={"product_id": str(product_id)}
         )
 
 
 class InsufficientStockError(BusinessLogicException):
     """Stock insuficiente para realizar la operación."""
+
+    __slots__ = ()
+
+    code_default = "INSUFFICIENT_STOCK"
     
     def __init__(
         self,
@@ -239,7 +317,7 @@ class InsufficientStockError(BusinessLogicException):
     ):
         super().__init__(
             message=f"Stock insuficiente para producto '{product_id}'",
-            code="INSUFFICIENT_STOCK",
+            code=self.code_default,
             details={
                 "product_id": str(product_id),
                 "required": required,
@@ -250,11 +328,15 @@ class InsufficientStockError(BusinessLogicException):
 
 class InvalidDateRangeError(BusinessLogicException):
     """Rango de fechas inválido."""
+
+    __slots__ = ()
+
+    code_default = "INVALID_DATE_RANGE"
     
     def __init__(self, start_date: str, end_date: str):
         super().__init__(
             message="La fecha inicial debe ser menor que la fecha final",
-            code="INVALID_DATE_RANGE",
+            code=self.code_default,
             details={
                 "start_date": start_date,
                 "end_date": end_date
@@ -264,11 +346,15 @@ class InvalidDateRangeError(BusinessLogicException):
 
 class StoreNotFoundError(BusinessLogicException):
     """Tienda no encontrada."""
+
+    __slots__ = ()
+
+    code_default = "STORE_NOT_FOUND"
     
     def __init__(self, store_id: Any):
         super().__init__(
             message=f"Tienda '{store_id}' no encontrada",
-            code="STORE_NOT_FOUND",
+            code=self.code_default,
             details={"store_id": str(store_id)}
         )
 
@@ -279,6 +365,8 @@ class StoreNotFoundError(BusinessLogicException):
 
 class FileException(BaseAppException):
     """Excepción base para errores de archivos."""
+
+    __slots__ = ()
     
     def __init__(
         self,
@@ -286,9 +374,8 @@ class FileException(BaseAppException):
         code: str = "FILE_ERROR",
         filename: Optional[str] = None
     ):
-        details = {}
-        if filename:
-            details["filename"] = filename
+        # Sin datos extra no se arma el dict (la base pone {} por defecto)
+        details = {"filename": filename} if filename else None
         
         super().__init__(
             message=message,
@@ -298,24 +385,32 @@ class FileException(BaseAppException):
         )
 
 
-class FileNotFoundError(FileException):
+class AppFileNotFoundError(FileException):
     """Archivo no encontrado."""
+
+    __slots__ = ()
+
+    code_default = "FILE_NOT_FOUND"
     
     def __init__(self, filename: str):
         super().__init__(
             message=f"Archivo '{filename}' no encontrado",
-            code="FILE_NOT_FOUND",
+            code=self.code_default,
             filename=filename
         )
 
 
 class FileGenerationError(FileException):
     """Error al generar archivo (Excel, PDF, etc.)."""
+
+    __slots__ = ()
+
+    code_default = "FILE_GENERATION_ERROR"
     
     def __init__(self, message: str, filename: Optional[str] = None):
         super().__init__(
             message=message,
-            code="FILE_GENERATION_ERROR",
+            code=self.code_default,
             filename=filename
         )
 
@@ -326,6 +421,8 @@ class FileGenerationError(FileException):
 
 class AuthException(BaseAppException):
     """Excepción base para errores de autenticación/autorización."""
+
+    __slots__ = ()
     
     def __init__(
         self,
@@ -341,21 +438,29 @@ class AuthException(BaseAppException):
 
 class UnauthorizedError(AuthException):
     """Usuario no autenticado."""
+
+    __slots__ = ()
+
+    code_default = "UNAUTHORIZED"
     
     def __init__(self, message: str = "Autenticación requerida"):
         super().__init__(
             message=message,
-            code="UNAUTHORIZED"
+            code=self.code_default
         )
 
 
 class ForbiddenError(AuthException):
     """Usuario autenticado pero sin permisos."""
+
+    __slots__ = ()
+
+    code_default = "FORBIDDEN"
     
     def __init__(self, message: str = "No tienes permisos para esta acción"):
         super().__init__(
             message=message,
-            code="FORBIDDEN"
+            code=self.code_default
         )
         self.status_code = 403
 
@@ -364,11 +469,14 @@ class ForbiddenError(AuthException):
 # HELPER FUNCTIONS
 # ==========================================
 
+@lru_cache(maxsize=64)
 def get_exception_by_code(code: str) -> type:
     """
     Obtiene la clase de excepción por su código.
     
-    Útil para deserializar errores desde logs o APIs.
+    Útil para deserializar errores desde logs o APIs. El resultado se
+    cachea de por vida: el conjunto de códigos es cerrado y la caché solo
+    se vacía si se registra una subclase nueva.
     
     Args:
         code: Código de error (ej: "PRODUCT_NOT_FOUND")
@@ -376,21 +484,42 @@ def get_exception_by_code(code: str) -> type:
     Returns:
         Clase de excepción correspondiente o BaseAppException
     """
-    exceptions_map = {
-        "DB_CONNECTION_ERROR": ConnectionError,
-        "DB_QUERY_ERROR": QueryError,
-        "DB_TRANSACTION_ERROR": TransactionError,
-        "INVALID_DATA": InvalidDataError,
-        "MISSING_FIELD": MissingFieldError,
-        "DUPLICATE_ENTRY": DuplicateEntryError,
-        "PRODUCT_NOT_FOUND": ProductNotFoundError,
-        "INSUFFICIENT_STOCK": InsufficientStockError,
-        "INVALID_DATE_RANGE": InvalidDateRangeError,
-        "STORE_NOT_FOUND": StoreNotFoundError,
-        "FILE_NOT_FOUND": FileNotFoundError,
-        "FILE_GENERATION_ERROR": FileGenerationError,
-        "UNAUTHORIZED": UnauthorizedError,
-        "FORBIDDEN": ForbiddenError,
-    }
-    
-    return exceptions_map.get(code, BaseAppException)
\ No newline at end of file
+    return _EXCEPTIONS_MAP.get(code, BaseAppException)
+
+
+# ==========================================
+# INSTANCIAS PREDEFINIDAS
+# ==========================================
+# Excepciones sin parámetros que se lanzan siempre con el mensaje por
+# defecto. Reutilizarlas evita el __init__ y el armado del payload en cada
+# raise. No se lanzan directamente: un objeto excepción guarda __cause__,
+# __context__ y __traceback__ del último raise, que se filtrarían a la
+# petición siguiente (o a otra concurrente). Siempre con raise_shared:
+#
+#     except KeyError as exc:
+#         raise_shared(UNAUTHORIZED, exc)
+
+UNAUTHORIZED = UnauthorizedError()
+FORBIDDEN = ForbiddenError()
+DB_CONNECTION_FAILED = ConnectionError()
+DB_TRANSACTION_FAILED = TransactionError()
+
+
+def raise_shared(exc: BaseAppException, cause: Optional[BaseException] = None):
+    """
+    Lanza una instancia predefinida sin compartir estado entre raises.
+
+    Se lanza una copia liviana: mismos args y atributos (el payload ya
+    armado incluido) pero sin pasar por __init__, con __cause__,
+    __context__ y __traceback__ propios de este raise.
+
+    Args:
+        exc: Instancia predefinida (UNAUTHORIZED, FORBIDDEN, ...)
+        cause: Excepción original, queda como __cause__ (``raise ... from``)
+    """
+    copia = BaseException.__new__(type(exc), *exc.args)
+    for atributo in BaseAppException.__slots__:
+        setattr(copia, atributo, getattr(exc, atributo))
+    if cause is None:
+        raise copia
+    raise copia from cause
@@ -18,11 +18,18 @@ Autor: Jonatan Corrales
 Fecha: Enero 2026
 """
 
+import atexit
+import functools
+import itertools
 import logging
 import logging.handlers
+import os
 import sys
+import time
 from pathlib import Path
-from typing import Any
+from queue import SimpleQueue
+from time import perf_counter_ns
+from typing import Any, Callable
 
 from app.config import settings
 
@@ -42,6 +49,13 @@ LOGS_DIR.mkdir(exist_ok=True)
 APP_LOG_FILE = LOGS_DIR / "app.log"
 ERROR_LOG_FILE = LOGS_DIR / "errors.log"
 
+# Entorno resuelto una sola vez al importar
+_IS_DEV = settings.app.environment == "development"
+
+# Colores solo en desarrollo y con la salida en una terminal (no en pipes
+# ni archivos redirigidos); NO_COLOR los desactiva (https://no-color.org)
+_USE_COLOR = _IS_DEV and sys.stdout.isatty() and not os.environ.get("NO_COLOR")
+
 
 # ==========================================
 # FORMATOS DE LOG
@@ -60,11 +74,31 @@ CONSOLE_FORMAT = "%(levelname)s:%(name)s:%(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
+# ==========================================
+# CONTEXTO ESTRUCTURADO
+# ==========================================
+
+class ContextFormatter(logging.Formatter):
+    """
+    Formateador que agrega al final el contexto de log_with_context.
+
+    El contexto viaja en el record (atributo ``_ctx``) y solo se convierte
+    a texto cuando el record realmente se emite.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        texto = super().format(record)
+        context = getattr(record, "_ctx", None)
+        if context:
+            texto += " | " + " | ".join(f"{k}={v}" for k, v in context.items())
+        return texto
+
+
 # ==========================================
 # COLORES PARA CONSOLA (Solo desarrollo)
 # ==========================================
 
-class ColoredFormatter(logging.Formatter):
+class ColoredFormatter(ContextFormatter):
     """
     Formateador que agrega colores a los logs en consola.
     Solo se usa en desarrollo para mejor legibilidad.
@@ -79,17 +113,21 @@ class ColoredFormatter(logging.Formatter):
         'CRITICAL': '\033[1;31m', # Bold Red
     }
     RESET = '\033[0m'
+
+    # Nombres de nivel ya coloreados (se arman una vez, no en cada log).
+    # RESET va literal: el ámbito de clase no es visible en la comprensión.
+    _COLORED = {level: f"{color}{level}\033[0m" for level, color in COLORS.items()}
     
     def format(self, record: logging.LogRecord) -> str:
         """Formatea el log con colores según el nivel."""
-        # Agregar color al nivel
+        # Colorear el nivel solo durante este formateo: el record es
+        # compartido con los demás handlers (archivos)
         levelname = record.levelname
-        if levelname in self.COLORS:
-            record.levelname = (
-                f"{self.COLORS[levelname]}{levelname}{self.RESET}"
-            )
-        
-        return super().format(record)
+        record.levelname = self._COLORED.get(levelname, levelname)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
 
 
 # ==========================================
@@ -116,14 +154,14 @@ def get_console_handler() -> logging.Handler:
     """
     console_handler = logging.StreamHandler(sys.stdout)
     
-    # Usar colores solo en desarrollo
-    if settings.app.environment == "development":
+    # Usar colores solo en desarrollo y en terminal
+    if _USE_COLOR:
         formatter = ColoredFormatter(
             fmt=CONSOLE_FORMAT,
             datefmt=DATE_FORMAT
         )
     else:
-        formatter = logging.Formatter(
+        formatter = ContextFormatter(
             fmt=CONSOLE_FORMAT,
             datefmt=DATE_FORMAT
         )
@@ -153,7 +191,7 @@ def get_file_handler() -> logging.Handler:
     # Formato del nombre de archivos rotados
     file_handler.suffix = "%Y-%m-%d"
     
-    formatter = logging.Formatter(
+    formatter = ContextFormatter(
         fmt=DETAILED_FORMAT,
         datefmt=DATE_FORMAT
     )
@@ -181,7 +219,7 @@ def get_error_file_handler() -> logging.Handler:
     error_handler.suffix = "%Y-%m-%d"
     error_handler.addFilter(ErrorFilter())  # Solo errores
     
-    formatter = logging.Formatter(
+    formatter = ContextFormatter(
         fmt=DETAILED_FORMAT,
         datefmt=DATE_FORMAT
     )
@@ -194,6 +232,10 @@ def get_error_file_handler() -> logging.Handler:
 # CONFIGURACIÓN DEL LOGGER ROOT
 # ==========================================
 
+# Listener que escribe los archivos de log en un hilo propio
+_queue_listener = None
+
+
 def setup_logging() -> None:
     """
     Configura el sistema de logging de la aplicación.
@@ -202,8 +244,8 @@ def setup_logging() -> None:
     Configura:
     - Logger root con nivel según entorno
     - Handler de consola (con colores en desarrollo)
-    - Handler de archivo general
-    - Handler de archivo de errores
+    - Handler de archivo general       } vía QueueHandler +
+    - Handler de archivo de errores    } QueueListener
     """
     
     # Obtener logger root
@@ -214,12 +256,27 @@ def setup_logging() -> None:
     root_logger.setLevel(log_level)
     
     # Limpiar handlers existentes (por si se ejecuta dos veces)
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        atexit.unregister(_queue_listener.stop)
     root_logger.handlers.clear()
     
+    # Los archivos se escriben desde un hilo aparte: quien loguea solo
+    # encola el record y no espera escritura ni rotación
+    log_queue = SimpleQueue()
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue,
+        get_file_handler(),
+        get_error_file_handler(),
+        respect_handler_level=True
+    )
+    _queue_listener.start()
+    atexit.register(_queue_listener.stop)
+
     # Agregar handlers
     root_logger.addHandler(get_console_handler())
-    root_logger.addHandler(get_file_handler())
-    root_logger.addHandler(get_error_file_handler())
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     # Prevenir que logs se propaguen al root de Python
     root_logger.propagate = False
@@ -263,24 +320,17 @@ def log_with_context(
             source="registration_form"
         )
     """
-    # Formatear contexto como JSON-like
-    if context:
-        context_str = " | ".join(f"{k}={v}" for k, v in context.items())
-        full_message = f"{message} | {context_str}"
-    else:
-        full_message = message
-    
-    logger.log(level, full_message)
+    if not logger.isEnabledFor(level):
+        return
+
+    # El contexto viaja como extra; ContextFormatter lo agrega al texto
+    logger.log(level, message, extra={"_ctx": context})
 
 
 # ==========================================
 # DECORADOR PARA LOGGING AUTOMÁTICO
 # ==========================================
 
-import functools
-from typing import Callable
-
-
 def log_execution(logger: logging.Logger):
     """
     Decorador para loguear automáticamente la ejecución de funciones.
@@ -298,22 +348,26 @@ def log_execution(logger: logging.Logger):
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            import time
             func_name = func.__name__
             
+            # Los mensajes DEBUG solo se arman si el nivel está habilitado
+            debug = logger.isEnabledFor(logging.DEBUG)
+
             # Log de inicio
-            logger.debug(f"Ejecutando {func_name}")
+            if debug:
+                logger.debug(f"Ejecutando {func_name}")
             start_time = time.time()
             
             try:
                 result = func(*args, **kwargs)
                 
                 # Log de éxito
-                elapsed = time.time() - start_time
-                logger.debug(
-                    f"Completado {func_name} | "
-                    f"Tiempo: {elapsed:.3f}s"
-                )
+                if debug:
+                    elapsed = time.time() - start_time
+                    logger.debug(
+                        f"Completado {func_name} | "
+                        f"Tiempo: {elapsed:.3f}s"
+                    )
                 
                 return result
                 
@@ -329,4 +383,48 @@ def log_execution(logger: logging.Logger):
                 raise
         
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+
+def log_execution_sampled(logger: logging.Logger, every: int = 100):
+    """
+    Variante de log_execution para funciones llamadas en bucles.
+
+    Loguea solo una de cada ``every`` ejecuciones exitosas (siempre los
+    errores) y mide con un único reloj monotónico en nanosegundos.
+
+    Uso:
+        @log_execution_sampled(logger, every=1000)
+        def procesar_linea(linea):
+            ...
+    """
+    def decorator(func: Callable) -> Callable:
+        func_name = func.__name__
+        contador = itertools.count()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                elapsed_ms = (perf_counter_ns() - start) / 1e6
+                logger.error(
+                    "Error en %s | Tiempo: %.3fms | Error: %s",
+                    func_name, elapsed_ms, e,
+                    exc_info=True
+                )
+                raise
+
+            if next(contador) % every == 0 and logger.isEnabledFor(logging.DEBUG):
+                elapsed_ms = (perf_counter_ns() - start) / 1e6
+                logger.debug(
+                    "Completado %s | Tiempo: %.3fms (muestra 1/%d)",
+                    func_name, elapsed_ms, every
+                )
+
+            return result
+
+        return wrapper
+    return decorator
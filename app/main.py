@@ -12,6 +12,7 @@ from app.logging_config import setup_logging
 setup_logging()
 
 import shutil
+import traceback
 import pandas as pd
 import logging
 from app.database import get_connection, text, test_connection, get_db_info, DATA_DIR, date_subtract_days, date_format_convert
@@ -26,7 +27,8 @@ from app.consultas import(
     get_analisis_marca
 )
 from app.cargar_csv import resetear_y_cargar
-from app.reports.excel_exporter import exportar_excel_formateado
+from app.utils.cache import invalidate_caches
+from app.reports.excel_exporter import exportar_excel_formateado, exportar_excel_simple
 
 from app.schemas import (
     ReabastecimientoMotorParams,
@@ -274,12 +276,14 @@ async def actualizar_inventario_fisico(file: UploadFile = File(...)):
                     no_encontrados.append(c_barra)
             
             conn.commit()
+            invalidate_caches()
 
         if no_encontrados:
             reports_dir = os.path.join(DATA_DIR, "reports")
             os.makedirs(reports_dir, exist_ok=True)
-            pd.DataFrame({"producto_id": no_encontrados}).to_excel(
-                os.path.join(reports_dir, "codigos_no_encontrados.xlsx"), index=False
+            exportar_excel_simple(
+                pd.DataFrame({"producto_id": no_encontrados}),
+                os.path.join(reports_dir, "codigos_no_encontrados.xlsx")
             )
 
         return {
@@ -308,9 +312,6 @@ async def calcular_reabastecimiento(
     Returns:
         JSON con items calculados y resumen
     """
-    import logging
-    from app.services.reabastecimiento_service import get_reabastecimiento_avanzado
-    
     logger = logging.getLogger(__name__)
     
     try:
@@ -703,7 +704,6 @@ async def preview_reabastecimiento(params: ReabastecimientoMotorParams):
         }
 
     except Exception as e:
-        import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -771,6 +771,7 @@ async def agregar_referencia_fija(codigo: dict):
                 {"c": codigo.get('codigo')}
             )
             conn.commit()
+            invalidate_caches()
         return JSONResponse({"success": True, "message": "Referencia agregada"})
     except Exception as e:
         return JSONResponse({"success": False, "error": str(e)})
@@ -787,6 +788,7 @@ async def eliminar_referencia_fija(codigo: str):
             )
             filas = result.rowcount
             conn.commit()
+            invalidate_caches()
             if filas == 0:
                 return JSONResponse({"success": False, "error": "Codigo no encontrado"}, status_code=404)
         return JSONResponse({"success": True, "message": f"Referencia {codigo} eliminada"})
@@ -811,6 +813,7 @@ async def agregar_codigo_excluido(codigo: dict):
                 {"c": codigo.get('codigo')}
             )
             conn.commit()
+            invalidate_caches()
         return JSONResponse({"success": True, "message": "Codigo excluido agregado"})
     except Exception as e:
         return JSONResponse({"success": False, "error": str(e)})
@@ -827,6 +830,7 @@ async def eliminar_codigo_excluido(codigo: str):
             )
             filas = result.rowcount
             conn.commit()
+            invalidate_caches()
             if filas == 0:
                 return JSONResponse({"success": False, "error": "Codigo no encontrado"}, status_code=404)
         return JSONResponse({"success": True, "message": "Codigo eliminado"})
@@ -839,7 +843,7 @@ async def obtener_stock_minimo():
         with get_connection() as conn:
             df = pd.read_sql("SELECT tipo, cantidad FROM stock_minimo_config", conn)
 
-            datos = {row['tipo']: int(row['cantidad']) for _, row in df.iterrows()}
+            datos = dict(zip(df['tipo'], df['cantidad'].astype(int)))
             if 'general' in datos and 'default' not in datos:
                 datos['default'] = datos['general']
 
@@ -863,6 +867,7 @@ async def actualizar_stock_minimo(config: dict):
                     {"tipo": tipo, "cantidad": cantidad}
                 )
             conn.commit()
+            invalidate_caches()
         return JSONResponse({"success": True, "message": "Configuracion actualizada correctamente"})
     except Exception as e:
         return JSONResponse({"success": False, "error": str(e)})
@@ -991,13 +996,13 @@ async def agregar_tienda(tienda: dict):
             )
             
             conn.commit()
+            invalidate_caches()
             
         logging.info(f"➕ Tienda agregada: {tienda.get('raw_name')}")
         return JSONResponse({"success": True, "message": "Tienda agregada correctamente"})
             
     except Exception as e:
         logging.error(f"Error al agregar tienda: {e}")
-        import traceback
         traceback.print_exc()
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
@@ -1044,13 +1049,13 @@ async def actualizar_tienda(raw_name: str, tienda: dict):
             )
             
             conn.commit()
+            invalidate_caches()
             
         logging.info(f"✅ Tienda actualizada exitosamente: {raw_name}")
         return JSONResponse({"success": True, "message": "Tienda actualizada correctamente"})
             
     except Exception as e:
         logging.error(f"❌ Error al actualizar tienda: {e}")
-        import traceback
         traceback.print_exc()
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
@@ -1079,6 +1084,7 @@ async def eliminar_tienda(raw_name: str):
                 {"raw_name": raw_name}
             )
             conn.commit()
+            invalidate_caches()
             
         logging.info(f"🗑️ Tienda eliminada: {raw_name}")
         return JSONResponse({"success": True, "message": "Tienda eliminada correctamente"})
@@ -1133,6 +1139,7 @@ async def toggle_tienda(nombre_tienda: str):
             logging.info(f"Filas afectadas: {result.rowcount}")
             
             conn.commit()
+            invalidate_caches()
             
         logging.info(f"{'✅ Activada' if nuevo_estado == 1 else '⛔ Desactivada'} tienda: {clean_name or raw_name}")
         
@@ -1145,7 +1152,6 @@ async def toggle_tienda(nombre_tienda: str):
             
     except Exception as e:
         logging.error(f"❌ Error al cambiar estado de tienda: {e}")
-        import traceback
         traceback.print_exc()
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
@@ -1158,6 +1164,7 @@ async def activar_todas_tiendas():
             result = conn.execute(text("UPDATE config_tiendas SET activa = 1"))
             count = result.rowcount
             conn.commit()
+            invalidate_caches()
             
         logging.info(f"✅ Activadas {count} tiendas")
         return JSONResponse({"success": True, "message": f"{count} tiendas activadas", "count": count})
@@ -1175,6 +1182,7 @@ async def desactivar_todas_tiendas():
             result = conn.execute(text("UPDATE config_tiendas SET activa = 0"))
             count = result.rowcount
             conn.commit()
+            invalidate_caches()
         
         logging.warning(f"⚠️ Desactivadas {count} tiendas")
         return JSONResponse({"success": True, "message": f"{count} tiendas desactivadas", "count": count})
@@ -1,10 +1,13 @@
 # app/middleware.py
 
 """
-Middleware para manejo global de excepciones en FastAPI.
+Manejo global de excepciones en FastAPI.
 
-Este middleware captura todas las excepciones de la aplicación,
-las loguea apropiadamente y retorna respuestas JSON estructuradas.
+Los exception handlers de este módulo se registran en la app con
+app.add_exception_handler(): capturan las excepciones de la aplicación,
+las loguean apropiadamente y retornan respuestas JSON estructuradas.
+No hay middleware intermedio, así que los requests exitosos no pagan
+ningún costo extra.
 
 Inspirado en:
 - Django REST Framework exception handling
@@ -21,52 +24,29 @@ import logging
 import traceback
 from typing import Union
 
+from app.config import settings
 from app.exceptions import BaseAppException
 
 # Logger para este módulo
 logger = logging.getLogger(__name__)
 
+# Respuestas de error serializadas con orjson cuando está instalado
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as ErrorResponse
+except ImportError:
+    ErrorResponse = JSONResponse
 
-# ==========================================
-# MIDDLEWARE DE EXCEPCIONES
-# ==========================================
+# Entorno resuelto una sola vez al importar
+_IS_PROD = settings.app.environment == "production"
 
-async def exception_handler_middleware(request: Request, call_next):
-    """
-    Middleware que captura todas las excepciones no manejadas.
-    
-    Flujo:
-    1. Intenta ejecutar el request
-    2. Si hay excepción, la captura
-    3. Loguea con el nivel apropiado
-    4. Retorna respuesta JSON estructurada
-    
-    Args:
-        request: Request de FastAPI
-        call_next: Siguiente middleware/handler
-        
-    Returns:
-        Response (normal o error)
-    """
-    try:
-        response = await call_next(request)
-        return response
-        
-    except BaseAppException as exc:
-        # Excepciones personalizadas de la aplicación
-        return handle_app_exception(exc, request)
-        
-    except RequestValidationError as exc:
-        # Errores de validación de Pydantic/FastAPI
-        return handle_validation_error(exc, request)
-        
-    except StarletteHTTPException as exc:
-        # Excepciones HTTP de Starlette
-        return handle_http_exception(exc, request)
-        
-    except Exception as exc:
-        # Cualquier otra excepción no manejada
-        return handle_unexpected_exception(exc, request)
+# Respuesta 500 de producción: constante, no expone detalles internos
+_PROD_500_BODY = {
+    "error": True,
+    "code": "INTERNAL_SERVER_ERROR",
+    "message": "Error interno del servidor. Por favor contacta al administrador.",
+    "details": {}
+}
 
 
 # ==========================================
@@ -82,25 +62,27 @@ def handle_app_exception(
     
     Estas son las que creamos en exceptions.py
     """
-    # Log según severidad del error
+    # Log según severidad del error (formato diferido: solo se arma si el
+    # nivel está habilitado; los detalles viajan también como extra)
     if exc.status_code >= 500:
-        # Errores de servidor (500+) son ERROR
-        logger.error(
-            f"Error en {request.method} {request.url.path} | "
-            f"Código: {exc.code} | "
-            f"Mensaje: {exc.message} | "
-            f"Detalles: {exc.details}",
-            exc_info=True
-        )
-    elif exc.status_code >= 400:
+        # Errores de servidor (500+) son ERROR. Si el nivel está filtrado no
+        # se arma nada: ni request.url ni el traceback.
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(
+                "Error en %s %s | Código: %s | Mensaje: %s | Detalles: %s",
+                request.method, request.url.path, exc.code, exc.message, exc.details,
+                exc_info=True,
+                extra={"details": exc.details}
+            )
+    elif exc.status_code >= 400 and logger.isEnabledFor(logging.WARNING):
         # Errores de cliente (400-499) son WARNING
         logger.warning(
-            f"Error de cliente en {request.method} {request.url.path} | "
-            f"Código: {exc.code} | "
-            f"Mensaje: {exc.message}"
+            "Error de cliente en %s %s | Código: %s | Mensaje: %s",
+            request.method, request.url.path, exc.code, exc.message,
+            extra={"details": exc.details}
         )
     
-    return JSONResponse(
+    return ErrorResponse(
         status_code=exc.status_code,
         content=exc.to_dict()
     )
@@ -115,20 +97,21 @@ def handle_validation_error(
     
     Ocurren cuando los datos enviados no cumplen el schema.
     """
-    errors = []
-    for error in exc.errors():
-        errors.append({
-            "field": ".".join(str(x) for x in error["loc"]),
+    errors = [
+        {
+            "field": ".".join(map(str, error["loc"])),
             "message": error["msg"],
             "type": error["type"]
-        })
+        }
+        for error in exc.errors()
+    ]
     
     logger.warning(
-        f"Error de validación en {request.method} {request.url.path} | "
-        f"Errores: {len(errors)}"
+        "Error de validación en %s %s | Errores: %d",
+        request.method, request.url.path, len(errors)
     )
     
-    return JSONResponse(
+    return ErrorResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "error": True,
@@ -147,10 +130,11 @@ def handle_http_exception(
     Maneja excepciones HTTP estándar (404, 405, etc.).
     """
     logger.info(
-        f"HTTP {exc.status_code} en {request.method} {request.url.path}"
+        "HTTP %s en %s %s",
+        exc.status_code, request.method, request.url.path
     )
     
-    return JSONResponse(
+    return ErrorResponse(
         status_code=exc.status_code,
         content={
             "error": True,
@@ -171,32 +155,29 @@ def handle_unexpected_exception(
     """
     # Log completo con stack trace
     logger.critical(
-        f"❌ EXCEPCIÓN NO MANEJADA en {request.method} {request.url.path} | "
-        f"Tipo: {type(exc).__name__} | "
-        f"Mensaje: {str(exc)}",
+        "❌ EXCEPCIÓN NO MANEJADA en %s %s | Tipo: %s | Mensaje: %s",
+        request.method, request.url.path, type(exc).__name__, exc,
         exc_info=True
     )
     
     # En producción, NO exponer detalles internos
-    from app.config import settings
-    
-    if settings.app.environment == "production":
-        message = "Error interno del servidor. Por favor contacta al administrador."
-        details = {}
-    else:
-        # En desarrollo, mostrar detalles para debugging
-        message = f"{type(exc).__name__}: {str(exc)}"
-        details = {
-            "traceback": traceback.format_exc()
-        }
-    
-    return JSONResponse(
+    if _IS_PROD:
+        return ErrorResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content=_PROD_500_BODY
+        )
+
+    # En desarrollo, mostrar detalles para debugging (el traceback solo se
+    # formatea en esta rama)
+    return ErrorResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": True,
             "code": "INTERNAL_SERVER_ERROR",
-            "message": message,
-            "details": details
+            "message": f"{type(exc).__name__}: {str(exc)}",
+            "details": {
+                "traceback": traceback.format_exc()
+            }
         }
     )
 
@@ -1,18 +1,187 @@
 # app/reports/excel_exporter.py
 
+import os
+import re
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
 from datetime import datetime
 
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
+from openpyxl.cell import Cell, WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
-from openpyxl.utils.dataframe import dataframe_to_rows
+
+from app.reports import xlsx_fast
+
+try:
+    import xlsxwriter
+except ImportError:  # xlsxwriter es opcional
+    xlsxwriter = None
+
+# ======================================================
+# 🎨 ESTILOS COMPARTIDOS
+# ======================================================
+# Se crean una sola vez al importar: todas las celdas reutilizan las mismas
+# instancias en vez de construir un Font/Border/Alignment por celda.
+
+_THIN = Side(border_style="thin", color="000000")
+_MEDIUM = Side(border_style="medium", color="000000")
+
+_BORDER_THIN = Border(top=_THIN, left=_THIN, right=_THIN, bottom=_THIN)
+_BORDER_HEADER = Border(top=_MEDIUM, left=_THIN, right=_THIN, bottom=_MEDIUM)
+_BORDER_BOTTOM = Border(bottom=_THIN)
+
+_FILL_HEADER = PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid")
+_FILL_ALT = PatternFill(start_color="F9F9F9", end_color="F9F9F9", fill_type="solid")
+_FILL_CONTROL = PatternFill(start_color="E8F4F8", end_color="E8F4F8", fill_type="solid")
+_FILL_TITLE = PatternFill(start_color="1F4E78", end_color="1F4E78", fill_type="solid")
+_FILL_SEPARADOR = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+
+_FONT_TITLE = Font(bold=True, size=16, color="FFFFFF")
+_FONT_TIENDA = Font(bold=True, size=12, color="1F4E78")
+_FONT_SEPARADOR = Font(bold=True, size=11, color="FFFFFF")
+_FONT_BOLD_11 = Font(bold=True, size=11)
+_FONT_BOLD_10 = Font(bold=True, size=10)
+
+_ALIGN_CENTER = Alignment(horizontal="center", vertical="center")
+_ALIGN_LEFT = Alignment(horizontal="left", vertical="center")
+_ALIGN_RIGHT = Alignment(horizontal="right", vertical="center")
+_ALIGN_HEADER = Alignment(horizontal="center", vertical="center", wrap_text=True)
+_ALIGN_V_CENTER = Alignment(vertical="center")
+
+
+def _estilo_celda(ws, **atributos):
+    """
+    Registra una combinación de estilos en el workbook de ``ws`` y devuelve
+    su StyleArray.
+
+    En los bucles de datos se copia a cada celda (ver ``_celdas_fila``):
+    asignar font/border/fill uno a uno vuelve a hashear cada objeto de estilo
+    contra las tablas del workbook, que es el costo dominante de openpyxl.
+    """
+    cell = WriteOnlyCell(ws)
+    for nombre, valor in atributos.items():
+        setattr(cell, nombre, valor)
+    return cell._style
+
+
+def _celdas_fila(ws, valores, estilo):
+    """
+    Celdas de una fila para ``ws.append``, creadas ya con una copia de
+    ``estilo``. El valor se asigna después del estilo, así que el formato
+    numérico que openpyxl pone a las fechas queda sobre el StyleArray.
+
+    Fila y columna provisionales como en WriteOnlyCell: ``append`` las
+    reemplaza por la posición real.
+    """
+    return [
+        Cell(ws, row=1, column=1, value=valor, style_array=copy(estilo))
+        for valor in valores
+    ]
+
+
+def _celda_numerica(ws, valor, estilo):
+    """
+    Celda de una columna int/float: el tipo ya se conoce por el dtype, así
+    que se asigna directo sin pasar por el setter de ``value`` (que revisa
+    fórmulas, fechas y caracteres ilegales en cada celda).
+    """
+    cell = Cell(ws, row=1, column=1, style_array=copy(estilo))
+    cell._value = valor
+    cell.data_type = "n"
+    return cell
+
+
+def _celda_generica(ws, valor, estilo):
+    return Cell(ws, row=1, column=1, value=valor, style_array=copy(estilo))
+
+
+def _constructores_columnas(df):
+    """
+    Constructor de celda para cada columna según su dtype, elegido una vez
+    antes del bucle de filas. Texto, fechas y demás siguen por el setter.
+    """
+    return [
+        _celda_numerica if dtype.kind in "iuf" else _celda_generica
+        for dtype in df.dtypes
+    ]
+
+
+def _celdas_datos(ws, constructores, valores, estilo):
+    """Celdas de una fila de datos con el constructor de cada columna."""
+    return [
+        constructor(ws, valor, estilo)
+        for constructor, valor in zip(constructores, valores)
+    ]
+
+
+def _anchos_columnas(df, minimo):
+    """
+    Ancho de cada columna a partir del DataFrame (largo máximo del texto,
+    header incluido, + 2; entre ``minimo`` y 50).
+
+    Se calcula con operaciones vectorizadas por columna en vez de recorrer
+    las celdas ya escritas. Las columnas enteras no se convierten a texto:
+    el valor más largo es el máximo o el mínimo (por el signo).
+    """
+    anchos = []
+    for col_name in df.columns:
+        valores = df[col_name].dropna()
+        if len(valores) == 0:
+            largo = 0
+        elif pd.api.types.is_integer_dtype(valores.dtype):
+            largo = max(len(str(valores.max())), len(str(valores.min())))
+        else:
+            largo = int(valores.astype(str).str.len().max())
+        anchos.append(min(max(max(len(str(col_name)), largo) + 2, minimo), 50))
+    return anchos
 
 # ======================================================
 # 🔧 EXPORTADOR EXCEL FORMATEADO
 # ======================================================
 
-def exportar_excel_formateado(df, archivo, nombre_reporte="Reporte", tipo_formato="general"):
+# Columnas del formato picking (en este orden) y su encabezado en el Excel
+_COLUMNAS_PICKING = {
+    'c_barra': 'Cod.Barras',
+    'd_marca': 'Marca',
+    'color': 'Color',
+    'cantidad_a_despachar': 'Cantidad',
+    'observacion': 'Observacion'
+}
+
+
+# Caracteres que Excel no admite en el nombre de una hoja
+_CARACTERES_HOJA_INVALIDOS = re.compile(r"[\\*?:/\[\]]")
+
+# Largo del nombre base; deja lugar al sufijo numérico dentro de los 31
+# caracteres que admite Excel
+_LARGO_NOMBRE_HOJA = 25
+
+
+def _nombre_hoja(tienda, usados):
+    """
+    Nombre de hoja válido y único para ``tienda``, igual en todos los motores.
+
+    Reemplaza por "_" los caracteres no permitidos, recorta a
+    _LARGO_NOMBRE_HOJA y, si el nombre ya existe (Excel no distingue
+    mayúsculas), agrega un sufijo 1, 2, ... como hace openpyxl. ``usados``
+    es el conjunto de nombres en minúsculas ya asignados; se actualiza.
+    """
+    base = _CARACTERES_HOJA_INVALIDOS.sub("_", ILLEGAL_CHARACTERS_RE.sub("", str(tienda)))
+    # Excel tampoco admite apóstrofes al inicio o al final ni nombres vacíos
+    base = base[:_LARGO_NOMBRE_HOJA].strip("'") or "Hoja"
+
+    nombre, sufijo = base, 0
+    while nombre.lower() in usados:
+        sufijo += 1
+        nombre = f"{base}{sufijo}"
+    usados.add(nombre.lower())
+    return nombre
+
+
+def exportar_excel_formateado(df, archivo, nombre_reporte="Reporte", tipo_formato="general", engine="openpyxl"):
     """
     Crea un Excel con una hoja por tienda, con formato visual profesional.
     
@@ -23,8 +192,19 @@ def exportar_excel_formateado(df, archivo, nombre_reporte="Reporte", tipo_format
         tipo_formato: Tipo de formato a aplicar
             - "general": Formato estándar (default)
             - "picking": Formato para picking con header de control
+        engine: Motor de escritura
+            - "openpyxl": (default)
+            - "xlsxwriter": escribe fila a fila en modo constant_memory
+              (memoria plana en el número de filas, requiere xlsxwriter)
+            - "xml": serializa cada hoja directamente a XML (xlsx_fast),
+              repartiendo las tiendas entre procesos en reportes grandes
     """
 
+    if engine not in ("openpyxl", "xlsxwriter", "xml"):
+        raise ValueError(f"Motor de Excel no soportado: {engine}")
+    if engine == "xlsxwriter" and xlsxwriter is None:
+        raise ImportError("engine='xlsxwriter' requiere instalar xlsxwriter")
+
     if df.empty:
         raise ValueError("El DataFrame está vacío, no se puede exportar.")
 
@@ -42,52 +222,80 @@ def exportar_excel_formateado(df, archivo, nombre_reporte="Reporte", tipo_format
         )
 
     # --- Preparar datos según tipo de formato ---
-    df_procesado = df.copy()
-    
+    # Sin copia: ningún motor modifica el DataFrame, y la selección de
+    # columnas del picking ya devuelve un objeto nuevo
+    df_procesado = df
+
     if tipo_formato == "picking":
-        column_mapping = {
-            'c_barra': 'Cod.Barras',
-            'd_marca': 'Marca',
-            'color': 'Color',
-            'cantidad_a_despachar': 'Cantidad',
-            'observacion': 'Observacion'
-        }
-        
-        columnas_picking = [col for col in column_mapping.keys() if col in df_procesado.columns]
-        df_procesado = df_procesado[[col_tienda] + columnas_picking].copy()
-        df_procesado = df_procesado.rename(columns=column_mapping)
+        presentes = frozenset(df_procesado.columns)
+        columnas_picking = [col for col in _COLUMNAS_PICKING if col in presentes]
+        df_procesado = df_procesado[[col_tienda] + columnas_picking].rename(
+            columns=_COLUMNAS_PICKING, copy=False
+        )
+
+    if engine == "xlsxwriter":
+        _exportar_xlsxwriter(df_procesado, col_tienda, archivo, nombre_reporte, tipo_formato)
+        print(f"\n🖨️ Archivo listo y formateado: {archivo}")
+        return
+
+    if engine == "xml":
+        _exportar_xml(df_procesado, col_tienda, archivo, nombre_reporte, tipo_formato)
+        print(f"\n🖨️ Archivo listo y formateado: {archivo}")
+        return
 
     # --- Crear workbook manualmente ---
-    wb = Workbook()
-    wb.remove(wb.active)  # Remover hoja por defecto
-    
-    thin = Side(border_style="thin", color="000000")
-    medium = Side(border_style="medium", color="000000")
-    header_fill = PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid")
-    alt_fill = PatternFill(start_color="F9F9F9", end_color="F9F9F9", fill_type="solid")
-    control_fill = PatternFill(start_color="E8F4F8", end_color="E8F4F8", fill_type="solid")
-
-    for tienda, df_tienda in df_procesado.groupby(col_tienda, sort=True):
-        hoja_nombre = str(tienda)[:25]
-        ws = wb.create_sheet(title=hoja_nombre)
-        
-        # Preparar datos para esta tienda
-        if tipo_formato == "picking":
-            df_escribir = df_tienda.drop(columns=[col_tienda])
-        else:
-            df_escribir = df_tienda
-        
-        # DIFERENCIA CLAVE: crear header ANTES de escribir datos
-        if tipo_formato == "picking":
-            _crear_hoja_picking(ws, df_escribir, hoja_nombre, nombre_reporte, thin, medium, header_fill, alt_fill, control_fill)
-        else:
-            _crear_hoja_general(ws, df_escribir, nombre_reporte, thin, header_fill, alt_fill)
+    if tipo_formato == "general":
+        # Sin celdas combinadas ni ediciones posteriores: las filas se
+        # escriben en streaming (write_only), sin cargar la grilla en memoria
+        wb = Workbook(write_only=True)
+    else:
+        # Picking necesita acceso aleatorio a celdas (merges del header)
+        wb = Workbook()
+        wb.remove(wb.active)  # Remover hoja por defecto
+
+    usados = set()
+    try:
+        for tienda, df_tienda in df_procesado.groupby(col_tienda, sort=True):
+            hoja_nombre = _nombre_hoja(tienda, usados)
+            ws = wb.create_sheet(title=hoja_nombre)
+
+            # Preparar datos para esta tienda
+            if tipo_formato == "picking":
+                df_escribir = df_tienda.drop(columns=[col_tienda])
+            else:
+                df_escribir = df_tienda
 
-    wb.save(archivo)
+            # DIFERENCIA CLAVE: crear header ANTES de escribir datos
+            if tipo_formato == "picking":
+                _crear_hoja_picking(ws, df_escribir, hoja_nombre, nombre_reporte)
+            else:
+                _crear_hoja_general(ws, df_escribir, nombre_reporte)
+
+        wb.save(archivo)
+    finally:
+        _cerrar_workbook(wb)
     print(f"\n🖨️ Archivo listo y formateado: {archivo}")
 
 
-def _crear_hoja_picking(ws, df, nombre_tienda, nombre_reporte, thin, medium, header_fill, alt_fill, control_fill):
+def _cerrar_workbook(wb):
+    """
+    Libera lo que un workbook de openpyxl deja abierto si no llegó a
+    guardarse. En write_only cada hoja escribe a un archivo temporal que
+    solo save() elimina; tras un save() exitoso no queda nada que hacer.
+    """
+    for ws in wb.worksheets:
+        writer = getattr(ws, "_writer", None)
+        if writer is None:
+            continue
+        # Cierra el generador de filas y el XML antes de borrar el archivo
+        if not ws.closed:
+            ws.close()
+        if os.path.exists(writer.out):
+            writer.cleanup()
+    wb.close()
+
+
+def _crear_hoja_picking(ws, df, nombre_tienda, nombre_reporte):
     """Crea hoja completa de picking con header + datos."""
     
     fecha_actual = datetime.now().strftime("%d/%m/%Y")
@@ -96,67 +304,65 @@ def _crear_hoja_picking(ws, df, nombre_tienda, nombre_reporte, thin, medium, hea
     # ========== HEADER DE CONTROL ==========
     
     # FILA 1-2: TÍTULO
-    ws.merge_cells('A1:F2')
-    ws['A1'] = f"🏢 JAGI - {nombre_reporte.upper()}"
-    ws['A1'].font = Font(bold=True, size=16, color="FFFFFF")
-    ws['A1'].alignment = Alignment(horizontal="center", vertical="center")
-    ws['A1'].fill = PatternFill(start_color="1F4E78", end_color="1F4E78", fill_type="solid")
+    ws.merge_cells(start_row=1, start_column=1, end_row=2, end_column=6)
+    cell = ws.cell(row=1, column=1, value=f"🏢 JAGI - {nombre_reporte.upper()}")
+    cell.font = _FONT_TITLE
+    cell.alignment = _ALIGN_CENTER
+    cell.fill = _FILL_TITLE
     ws.row_dimensions[1].height = 25
     ws.row_dimensions[2].height = 25
     
     # FILA 3: TIENDA Y FECHA
-    ws.merge_cells('A3:C3')
-    ws['A3'] = f"📍 TIENDA: {nombre_tienda}"
-    ws['A3'].font = Font(bold=True, size=12, color="1F4E78")
-    ws['A3'].alignment = Alignment(horizontal="left", vertical="center")
-    ws['A3'].fill = PatternFill(start_color="E8F4F8", end_color="E8F4F8", fill_type="solid")
-    
-    ws.merge_cells('D3:F3')
-    ws['D3'] = f"📅 Fecha: {fecha_actual}"
-    ws['D3'].font = Font(bold=True, size=11)
-    ws['D3'].alignment = Alignment(horizontal="right", vertical="center")
-    ws['D3'].fill = PatternFill(start_color="E8F4F8", end_color="E8F4F8", fill_type="solid")
+    ws.merge_cells(start_row=3, start_column=1, end_row=3, end_column=3)
+    cell = ws.cell(row=3, column=1, value=f"📍 TIENDA: {nombre_tienda}")
+    cell.font = _FONT_TIENDA
+    cell.alignment = _ALIGN_LEFT
+    cell.fill = _FILL_CONTROL
+    
+    ws.merge_cells(start_row=3, start_column=4, end_row=3, end_column=6)
+    cell = ws.cell(row=3, column=4, value=f"📅 Fecha: {fecha_actual}")
+    cell.font = _FONT_BOLD_11
+    cell.alignment = _ALIGN_RIGHT
+    cell.fill = _FILL_CONTROL
     ws.row_dimensions[3].height = 20
     
     # FILA 4: SEPARADOR
-    ws.merge_cells('A4:F4')
-    ws['A4'] = "━━━ CONTROL DE PICKING ━━━"
-    ws['A4'].font = Font(bold=True, size=11, color="FFFFFF")
-    ws['A4'].alignment = Alignment(horizontal="center", vertical="center")
-    ws['A4'].fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    ws.merge_cells(start_row=4, start_column=1, end_row=4, end_column=6)
+    cell = ws.cell(row=4, column=1, value="━━━ CONTROL DE PICKING ━━━")
+    cell.font = _FONT_SEPARADOR
+    cell.alignment = _ALIGN_CENTER
+    cell.fill = _FILL_SEPARADOR
     ws.row_dimensions[4].height = 20
     
     # FILA 5: ESPACIO
     ws.row_dimensions[5].height = 5
     
     # FILA 6: HORA INICIO Y FINAL
-    ws.merge_cells('A6:B6')
-    ws['A6'] = "⏰ Hora Inicio:"
-    ws['A6'].font = Font(bold=True, size=10)
-    ws['A6'].alignment = Alignment(horizontal="right", vertical="center")
-    ws['C6'].border = Border(bottom=thin)
-    
-    ws.merge_cells('D6:E6')
-    ws['D6'] = "⏰ Hora Final:"
-    ws['D6'].font = Font(bold=True, size=10)
-    ws['D6'].alignment = Alignment(horizontal="right", vertical="center")
-    ws['F6'].border = Border(bottom=thin)
+    ws.merge_cells(start_row=6, start_column=1, end_row=6, end_column=2)
+    cell = ws.cell(row=6, column=1, value="⏰ Hora Inicio:")
+    cell.font = _FONT_BOLD_10
+    cell.alignment = _ALIGN_RIGHT
+    ws.cell(row=6, column=3).border = _BORDER_BOTTOM
+    
+    ws.merge_cells(start_row=6, start_column=4, end_row=6, end_column=5)
+    cell = ws.cell(row=6, column=4, value="⏰ Hora Final:")
+    cell.font = _FONT_BOLD_10
+    cell.alignment = _ALIGN_RIGHT
+    ws.cell(row=6, column=6).border = _BORDER_BOTTOM
     ws.row_dimensions[6].height = 20
     
     # FILA 7: ESPACIO
     ws.row_dimensions[7].height = 5
     
     # FILA 8: ENCARGADO
-    ws.merge_cells('A8:B8')
-    ws['A8'] = "👤 Encargado:"
-    ws['A8'].font = Font(bold=True, size=10)
-    ws['A8'].alignment = Alignment(horizontal="right", vertical="center")
-    ws.merge_cells('C8:F8')
+    ws.merge_cells(start_row=8, start_column=1, end_row=8, end_column=2)
+    cell = ws.cell(row=8, column=1, value="👤 Encargado:")
+    cell.font = _FONT_BOLD_10
+    cell.alignment = _ALIGN_RIGHT
+    ws.merge_cells(start_row=8, start_column=3, end_row=8, end_column=6)
     # APLICAR EL BORDE A TODO EL RANGO (C8, D8, E8, F8)
-    border_bottom = Border(bottom=thin)
-    for row in ws['C8:F8']:
-        for cell in row:
-            cell.border = border_bottom
+    for col_idx in range(3, 7):
+        ws.cell(row=8, column=col_idx).border = _BORDER_BOTTOM
     ws.row_dimensions[8].height = 20
     
     # FILA 9: ESPACIO
@@ -169,76 +375,66 @@ def _crear_hoja_picking(ws, df, nombre_tienda, nombre_reporte, thin, medium, hea
     
     # Columna A: Checkbox
     ws.column_dimensions['A'].width = 4
-    ws['A10'] = "☐"
-    ws['A10'].font = Font(bold=True, size=11)
-    ws['A10'].alignment = Alignment(horizontal="center", vertical="center")
-    ws['A10'].fill = header_fill
-    ws['A10'].border = Border(top=medium, left=thin, right=thin, bottom=medium)
+    cell = ws.cell(row=fila_header, column=1, value="☐")
+    cell.font = _FONT_BOLD_11
+    cell.alignment = _ALIGN_CENTER
+    cell.fill = _FILL_HEADER
+    cell.border = _BORDER_HEADER
     
+    columnas = list(df.columns)
+
     # Headers de datos (columnas B en adelante)
-    for col_idx, col_name in enumerate(df.columns, start=2):
-        col_letter = get_column_letter(col_idx)
-        cell = ws.cell(row=fila_header, column=col_idx)
-        cell.value = col_name
-        cell.font = Font(bold=True, size=11)
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        cell.fill = header_fill
-        cell.border = Border(top=medium, left=thin, right=thin, bottom=medium)
+    for col_idx, col_name in enumerate(columnas, start=2):
+        cell = ws.cell(row=fila_header, column=col_idx, value=col_name)
+        cell.font = _FONT_BOLD_11
+        cell.alignment = _ALIGN_HEADER
+        cell.fill = _FILL_HEADER
+        cell.border = _BORDER_HEADER
     
     ws.row_dimensions[fila_header].height = 30
     
-    # Escribir datos
-    for i, (idx, row) in enumerate(df.iterrows()):
-        fila = fila_datos_inicio + i
-        
-        # Checkbox
-        ws.cell(row=fila, column=1).value = "☐"
-        ws.cell(row=fila, column=1).alignment = Alignment(horizontal="center", vertical="center")
-        ws.cell(row=fila, column=1).border = Border(top=thin, left=thin, right=thin, bottom=thin)
-        
+    # Estilos de las filas de datos (normal / alterna), registrados una vez
+    estilo_check = _estilo_celda(ws, alignment=_ALIGN_CENTER, border=_BORDER_THIN)
+    estilo_check_alt = _estilo_celda(ws, alignment=_ALIGN_CENTER, border=_BORDER_THIN, fill=_FILL_ALT)
+    estilo_dato = _estilo_celda(ws, alignment=_ALIGN_V_CENTER, border=_BORDER_THIN)
+    estilo_dato_alt = _estilo_celda(ws, alignment=_ALIGN_V_CENTER, border=_BORDER_THIN, fill=_FILL_ALT)
+
+    # Escribir datos fila completa con ws.append (tuplas planas: sin un
+    # Series por fila). El header quedó en la fila 10: append sigue en la 11.
+    constructores = _constructores_columnas(df)
+    for i, row in enumerate(df.itertuples(index=False, name=None)):
         # Alternar color
-        fill = alt_fill if fila % 2 == 0 else None
-        if fill:
-            ws.cell(row=fila, column=1).fill = fill
-        
-        # Datos
-        for col_idx, value in enumerate(row, start=2):
-            cell = ws.cell(row=fila, column=col_idx)
-            cell.value = value
-            cell.alignment = Alignment(vertical="center")
-            cell.border = Border(top=thin, left=thin, right=thin, bottom=thin)
-            if fill:
-                cell.fill = fill
+        alterna = (fila_datos_inicio + i) % 2 == 0
+
+        # Checkbox + datos
+        celdas = _celdas_fila(ws, ("☐",), estilo_check_alt if alterna else estilo_check)
+        celdas += _celdas_datos(ws, constructores, row, estilo_dato_alt if alterna else estilo_dato)
+        ws.append(celdas)
     
-    # Auto-ajuste de columnas
-    for col_idx in range(2, len(df.columns) + 2):
-        col_letter = get_column_letter(col_idx)
-        max_length = len(str(df.columns[col_idx - 2]))
-        for cell in ws[col_letter]:
-            if cell.value and cell.row >= fila_header:
-                max_length = max(max_length, len(str(cell.value)))
-        ws.column_dimensions[col_letter].width = min(max(max_length + 2, 12), 50)
+    # Auto-ajuste de columnas (calculado sobre el DataFrame)
+    for col_idx, ancho in enumerate(_anchos_columnas(df, 12), start=2):
+        ws.column_dimensions[get_column_letter(col_idx)].width = ancho
     
     # Firma al final
     ultima_fila = fila_datos_inicio + len(df) + 2
     
     # Firma (Mezclamos A y B)
-    ws.merge_cells(f'A{ultima_fila}:B{ultima_fila}')
-    ws[f'A{ultima_fila}'] = "✍️ Firma:"
-    ws[f'A{ultima_fila}'].font = Font(bold=True, size=11)
-    ws[f'A{ultima_fila}'].alignment = Alignment(horizontal="right", vertical="center")
+    ws.merge_cells(start_row=ultima_fila, start_column=1, end_row=ultima_fila, end_column=2)
+    cell = ws.cell(row=ultima_fila, column=1, value="✍️ Firma:")
+    cell.font = _FONT_BOLD_11
+    cell.alignment = _ALIGN_RIGHT
 
     # Columna C: Línea para firmar
-    ws[f'C{ultima_fila}'].border = Border(bottom=thin)
+    ws.cell(row=ultima_fila, column=3).border = _BORDER_BOTTOM
 
     # Fecha (Mezclamos D y E)
-    ws.merge_cells(f'D{ultima_fila}:E{ultima_fila}')
-    ws[f'D{ultima_fila}'] = "📅 Fecha:"
-    ws[f'D{ultima_fila}'].font = Font(bold=True, size=11)
-    ws[f'D{ultima_fila}'].alignment = Alignment(horizontal="right", vertical="center")
+    ws.merge_cells(start_row=ultima_fila, start_column=4, end_row=ultima_fila, end_column=5)
+    cell = ws.cell(row=ultima_fila, column=4, value="📅 Fecha:")
+    cell.font = _FONT_BOLD_11
+    cell.alignment = _ALIGN_RIGHT
     
     # Columna F: Línea para la fecha
-    ws[f'F{ultima_fila}'].border = Border(bottom=thin)
+    ws.cell(row=ultima_fila, column=6).border = _BORDER_BOTTOM
     
     # Ajuste de altura para que el borde inferior se vea claro
     ws.row_dimensions[ultima_fila].height = 25
@@ -263,44 +459,29 @@ def _crear_hoja_picking(ws, df, nombre_tienda, nombre_reporte, thin, medium, hea
         pass
 
 
-def _crear_hoja_general(ws, df, nombre_reporte, thin, header_fill, alt_fill):
-    """Crea hoja estándar general."""
-    
-    # Escribir headers
-    for col_idx, col_name in enumerate(df.columns, start=1):
-        cell = ws.cell(row=1, column=col_idx)
-        cell.value = col_name
-        cell.font = Font(bold=True, size=11)
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        cell.fill = header_fill
-        cell.border = Border(top=thin, left=thin, right=thin, bottom=thin)
-    
+def _crear_hoja_general(ws, df, nombre_reporte):
+    """
+    Crea hoja estándar general sobre una hoja write_only.
+
+    En write_only las celdas no se pueden revisitar: anchos, alto del header,
+    paneles e impresión se configuran antes de escribir la primera fila.
+    """
+    columnas = list(df.columns)
+
+    # Estilos de header y de filas de datos (normal / alterna)
+    estilo_header = _estilo_celda(
+        ws, font=_FONT_BOLD_11, alignment=_ALIGN_HEADER, fill=_FILL_HEADER, border=_BORDER_THIN
+    )
+    estilo_dato = _estilo_celda(ws, alignment=_ALIGN_V_CENTER, border=_BORDER_THIN)
+    estilo_dato_alt = _estilo_celda(ws, alignment=_ALIGN_V_CENTER, border=_BORDER_THIN, fill=_FILL_ALT)
+
+    # Auto-ajuste (calculado sobre el DataFrame, antes de escribir)
+    for col_idx, ancho in enumerate(_anchos_columnas(df, 10), start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = ancho
+
     ws.row_dimensions[1].height = 40
-    
-    # Escribir datos
-    for i, (idx, row) in enumerate(df.iterrows()):
-        fila = i + 2  # Fila 2 es la primera de datos (después del header en fila 1)
-        fill = alt_fill if fila % 2 == 0 else None
-        
-        for col_idx, value in enumerate(row, start=1):
-            cell = ws.cell(row=fila, column=col_idx)
-            cell.value = value
-            cell.alignment = Alignment(vertical="center")
-            cell.border = Border(top=thin, left=thin, right=thin, bottom=thin)
-            if fill:
-                cell.fill = fill
-    
-    # Auto-ajuste
-    for col_idx in range(1, len(df.columns) + 1):
-        col_letter = get_column_letter(col_idx)
-        max_length = 0
-        for cell in ws[col_letter]:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws.column_dimensions[col_letter].width = min(max(max_length + 2, 10), 50)
-    
     ws.freeze_panes = "A2"
-    ws.page_setup.orientation = ws.ORIENTATION_PORTRAIT
+    ws.page_setup.orientation = "portrait"
     ws.page_setup.fitToWidth = 1
     ws.page_setup.fitToHeight = 0
     ws.print_options.horizontalCentered = True
@@ -310,4 +491,277 @@ def _crear_hoja_general(ws, df, nombre_reporte, thin, header_fill, alt_fill):
         ws.oddHeader.right.text = "&RPágina &P de &N"
         ws.oddFooter.center.text = "&CGenerado automáticamente"
     except:
-        pass
\ No newline at end of file
+        pass
+
+    # Escribir headers
+    ws.append(_celdas_fila(ws, columnas, estilo_header))
+    
+    # Escribir datos
+    constructores = _constructores_columnas(df)
+    for i, row in enumerate(df.itertuples(index=False, name=None)):
+        fila = i + 2  # Fila 2 es la primera de datos (después del header en fila 1)
+        estilo = estilo_dato_alt if fila % 2 == 0 else estilo_dato
+        ws.append(_celdas_datos(ws, constructores, row, estilo))
+
+# ======================================================
+# ⚡ MOTOR XLSXWRITER (constant_memory)
+# ======================================================
+# Mismo diseño que las hojas openpyxl. En constant_memory cada fila se vuelca
+# a disco al pasar a la siguiente: todo se escribe en orden de fila y las
+# alturas se fijan antes de escribir la fila correspondiente.
+
+_BORDE_XW = {"border": 1, "border_color": "#000000"}
+_BORDE_HEADER_XW = {
+    "top": 2, "bottom": 2, "left": 1, "right": 1, "border_color": "#000000"
+}
+
+
+def _formatos_xlsxwriter(wb):
+    """Crea los formatos compartidos del workbook (xlsxwriter los deduplica)."""
+    centro = {"align": "center", "valign": "vcenter"}
+    derecha = {"align": "right", "valign": "vcenter"}
+    alterna = {"bg_color": "#F9F9F9"}
+    header = {"bold": True, "size": 11, "bg_color": "#CCE5FF", **centro}
+
+    return {
+        "vacio": wb.add_format(),
+        "titulo": wb.add_format(
+            {"bold": True, "size": 16, "font_color": "#FFFFFF", "bg_color": "#1F4E78", **centro}
+        ),
+        "tienda": wb.add_format(
+            {"bold": True, "size": 12, "font_color": "#1F4E78", "bg_color": "#E8F4F8",
+             "align": "left", "valign": "vcenter"}
+        ),
+        "fecha": wb.add_format({"bold": True, "size": 11, "bg_color": "#E8F4F8", **derecha}),
+        "separador": wb.add_format(
+            {"bold": True, "size": 11, "font_color": "#FFFFFF", "bg_color": "#4472C4", **centro}
+        ),
+        "etiqueta": wb.add_format({"bold": True, "size": 10, **derecha}),
+        "etiqueta_firma": wb.add_format({"bold": True, "size": 11, **derecha}),
+        "linea": wb.add_format({"bottom": 1, "border_color": "#000000"}),
+        "check_header": wb.add_format({**header, **_BORDE_HEADER_XW}),
+        "header_picking": wb.add_format({**header, "text_wrap": True, **_BORDE_HEADER_XW}),
+        "header_general": wb.add_format({**header, "text_wrap": True, **_BORDE_XW}),
+        "check": wb.add_format({**centro, **_BORDE_XW}),
+        "check_alt": wb.add_format({**centro, **_BORDE_XW, **alterna}),
+        "dato": wb.add_format({"valign": "vcenter", **_BORDE_XW}),
+        "dato_alt": wb.add_format({"valign": "vcenter", **_BORDE_XW, **alterna}),
+        "dato_fecha": wb.add_format({"valign": "vcenter", "num_format": "yyyy-mm-dd h:mm:ss", **_BORDE_XW}),
+        "dato_fecha_alt": wb.add_format(
+            {"valign": "vcenter", "num_format": "yyyy-mm-dd h:mm:ss", **_BORDE_XW, **alterna}
+        ),
+    }
+
+
+def _exportar_xlsxwriter(df, col_tienda, archivo, nombre_reporte, tipo_formato):
+    """Escribe el workbook completo con xlsxwriter (una hoja por tienda)."""
+    wb = xlsxwriter.Workbook(archivo, {
+        "constant_memory": True,
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+        "strings_to_numbers": False,
+    })
+    formatos = _formatos_xlsxwriter(wb)
+
+    usados = set()
+    try:
+        for tienda, df_tienda in df.groupby(col_tienda, sort=True):
+            hoja_nombre = _nombre_hoja(tienda, usados)
+            ws = wb.add_worksheet(hoja_nombre)
+
+            if tipo_formato == "picking":
+                df_escribir = df_tienda.drop(columns=[col_tienda])
+                _crear_hoja_picking_xlsxwriter(ws, formatos, df_escribir, hoja_nombre, nombre_reporte)
+            else:
+                _crear_hoja_general_xlsxwriter(ws, formatos, df_tienda, nombre_reporte)
+    finally:
+        wb.close()
+
+
+def _filas_xlsxwriter(df):
+    """Filas del DataFrame como tuplas planas, con NaN -> None (celda vacía)."""
+    valores = df.astype(object).where(df.notna(), None)
+    return valores.itertuples(index=False, name=None)
+
+
+def _escribir_fila_xlsxwriter(ws, formatos, fila, col_inicio, row, alterna, fechas):
+    """
+    Escribe una fila de datos. Las columnas de fecha se reescriben con un
+    formato que incluye num_format: con un formato explícito xlsxwriter no
+    aplica el de fechas por defecto.
+    """
+    ws.write_row(fila, col_inicio, row, formatos["dato_alt" if alterna else "dato"])
+    formato_fecha = formatos["dato_fecha_alt" if alterna else "dato_fecha"]
+    for j in fechas:
+        if row[j] is not None:
+            ws.write_datetime(fila, col_inicio + j, row[j], formato_fecha)
+
+
+def _columnas_fecha(df):
+    return [j for j, dtype in enumerate(df.dtypes) if pd.api.types.is_datetime64_any_dtype(dtype)]
+
+
+def _crear_hoja_picking_xlsxwriter(ws, formatos, df, nombre_tienda, nombre_reporte):
+    """Versión xlsxwriter de _crear_hoja_picking (filas 0-indexadas)."""
+
+    fecha_actual = datetime.now().strftime("%d/%m/%Y")
+    columnas = list(df.columns)
+
+    # Alturas del header de control (antes de escribir cada fila)
+    for fila, alto in ((0, 25), (1, 25), (2, 20), (3, 20), (4, 5), (5, 20), (6, 5), (7, 20), (8, 10), (9, 30)):
+        ws.set_row(fila, alto)
+
+    # Anchos: checkbox fijo + auto-ajuste sobre el DataFrame
+    ws.set_column(0, 0, 4)
+    for col_idx, ancho in enumerate(_anchos_columnas(df, 12), start=1):
+        ws.set_column(col_idx, col_idx, ancho)
+
+    # ========== HEADER DE CONTROL ==========
+    ws.merge_range(0, 0, 1, 5, f"🏢 JAGI - {nombre_reporte.upper()}", formatos["titulo"])
+    ws.merge_range(2, 0, 2, 2, f"📍 TIENDA: {nombre_tienda}", formatos["tienda"])
+    ws.merge_range(2, 3, 2, 5, f"📅 Fecha: {fecha_actual}", formatos["fecha"])
+    ws.merge_range(3, 0, 3, 5, "━━━ CONTROL DE PICKING ━━━", formatos["separador"])
+
+    # Filas espaciadoras: en constant_memory una fila sin celdas nunca se
+    # vuelca y perdería su altura, así que llevan una celda vacía
+    ws.write_blank(4, 0, None, formatos["vacio"])
+
+    ws.merge_range(5, 0, 5, 1, "⏰ Hora Inicio:", formatos["etiqueta"])
+    ws.write_blank(5, 2, None, formatos["linea"])
+    ws.merge_range(5, 3, 5, 4, "⏰ Hora Final:", formatos["etiqueta"])
+    ws.write_blank(5, 5, None, formatos["linea"])
+    ws.write_blank(6, 0, None, formatos["vacio"])
+
+    ws.merge_range(7, 0, 7, 1, "👤 Encargado:", formatos["etiqueta"])
+    ws.merge_range(7, 2, 7, 5, "", formatos["linea"])
+    ws.write_blank(8, 0, None, formatos["vacio"])
+
+    # ========== DATOS ==========
+    ws.write(9, 0, "☐", formatos["check_header"])
+    for col_idx, col_name in enumerate(columnas, start=1):
+        ws.write(9, col_idx, col_name, formatos["header_picking"])
+
+    fechas = _columnas_fecha(df)
+    for fila, row in enumerate(_filas_xlsxwriter(df), start=10):
+        # Alternar color (misma paridad que la fila 1-indexada de openpyxl)
+        alterna = (fila + 1) % 2 == 0
+        ws.write_string(fila, 0, "☐", formatos["check_alt" if alterna else "check"])
+        _escribir_fila_xlsxwriter(ws, formatos, fila, 1, row, alterna, fechas)
+
+    # Firma al final
+    ultima_fila = 10 + len(df) + 2
+    ws.set_row(ultima_fila, 25)
+    ws.merge_range(ultima_fila, 0, ultima_fila, 1, "✍️ Firma:", formatos["etiqueta_firma"])
+    ws.write_blank(ultima_fila, 2, None, formatos["linea"])
+    ws.merge_range(ultima_fila, 3, ultima_fila, 4, "📅 Fecha:", formatos["etiqueta_firma"])
+    ws.write_blank(ultima_fila, 5, None, formatos["linea"])
+
+    # Configuración de impresión
+    ws.set_portrait()
+    ws.fit_to_pages(1, 0)
+    ws.center_horizontally()
+    ws.set_margins(left=0.5, right=0.5, top=0.75, bottom=0.75)
+    ws.freeze_panes(10, 0)
+    ws.set_header(f"&L{nombre_reporte}&R{nombre_tienda}", margin=0.5)
+    ws.set_footer("&CPágina &P de &N", margin=0.5)
+
+
+def _crear_hoja_general_xlsxwriter(ws, formatos, df, nombre_reporte):
+    """Versión xlsxwriter de _crear_hoja_general."""
+    columnas = list(df.columns)
+
+    for col_idx, ancho in enumerate(_anchos_columnas(df, 10)):
+        ws.set_column(col_idx, col_idx, ancho)
+
+    ws.set_row(0, 40)
+    ws.write_row(0, 0, columnas, formatos["header_general"])
+
+    fechas = _columnas_fecha(df)
+    for fila, row in enumerate(_filas_xlsxwriter(df), start=1):
+        alterna = (fila + 1) % 2 == 0
+        _escribir_fila_xlsxwriter(ws, formatos, fila, 0, row, alterna, fechas)
+
+    ws.freeze_panes(1, 0)
+    ws.set_portrait()
+    ws.fit_to_pages(1, 0)
+    ws.center_horizontally()
+    ws.set_margins(left=0.75, right=0.75, top=1, bottom=1)
+    ws.set_header(f"&LJAGI - {nombre_reporte}&RPágina &P de &N", margin=0.5)
+    ws.set_footer("&CGenerado automáticamente", margin=0.5)
+
+# ======================================================
+# 🧵 MOTOR XML (hojas en paralelo)
+# ======================================================
+
+# Por debajo de este número de filas el arranque de procesos cuesta más que
+# serializar todas las hojas en el proceso actual
+_MIN_FILAS_PARALELO = 20000
+
+
+def _exportar_xml(df, col_tienda, archivo, nombre_reporte, tipo_formato):
+    """
+    Serializa una hoja por tienda con xlsx_fast y arma el .xlsx.
+
+    Las hojas son independientes entre sí: con varias tiendas y suficientes
+    filas se construyen en un ProcessPoolExecutor (el trabajo es Python puro
+    y no escala con hilos por el GIL). Los DataFrames viajan a los procesos
+    por pickle, que ya copia los buffers de NumPy sin convertir fila a fila.
+    """
+    fecha_actual = datetime.now().strftime("%d/%m/%Y")
+    minimo = 12 if tipo_formato == "picking" else 10
+
+    # Índice posicional: cada hoja toma sus filas de la tabla de sharedStrings
+    df = df.reset_index(drop=True)
+    compartidas, cadenas, referencias = xlsx_fast.preparar_compartidas(df)
+
+    nombres, tareas, usados = [], [], set()
+    for tienda, df_tienda in df.groupby(col_tienda, sort=True):
+        hoja_nombre = _nombre_hoja(tienda, usados)
+        if tipo_formato == "picking":
+            df_tienda = df_tienda.drop(columns=[col_tienda])
+        nombres.append(hoja_nombre)
+        tareas.append((
+            tipo_formato, df_tienda, hoja_nombre, nombre_reporte, fecha_actual,
+            _anchos_columnas(df_tienda, minimo),
+            None if compartidas is None else compartidas.iloc[df_tienda.index],
+        ))
+
+    procesos = min(os.cpu_count() or 1, len(tareas))
+    if procesos > 1 and len(df) >= _MIN_FILAS_PARALELO:
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            hojas_xml = list(executor.map(xlsx_fast.construir_hoja, tareas))
+    else:
+        hojas_xml = [xlsx_fast.construir_hoja(tarea) for tarea in tareas]
+
+    xlsx_fast.escribir_xlsx(archivo, list(zip(nombres, hojas_xml)), cadenas, referencias)
+
+# ======================================================
+# 📄 EXPORTADOR EXCEL SIMPLE (SIN FORMATO)
+# ======================================================
+
+def exportar_excel_simple(df, archivo, nombre_hoja="Sheet1"):
+    """
+    Vuelca un DataFrame a Excel sin formato, en modo write_only.
+    
+    Equivale a df.to_excel(archivo, index=False) pero escribe las filas en
+    streaming, sin crear un objeto celda por valor.
+    
+    Args:
+        df: DataFrame con los datos a exportar
+        archivo: Ruta del archivo de salida
+        nombre_hoja: Nombre de la hoja
+    """
+    wb = Workbook(write_only=True)
+    try:
+        ws = wb.create_sheet(title=nombre_hoja)
+
+        ws.append([str(col) for col in df.columns])
+
+        # NaN -> celda vacía, igual que to_excel
+        valores = df.astype(object).where(df.notna(), None)
+        for fila in valores.itertuples(index=False, name=None):
+            ws.append(fila)
+
+        wb.save(archivo)
+    finally:
+        _cerrar_workbook(wb)
@@ -0,0 +1,542 @@
+# app/reports/xlsx_fast.py
+
+"""
+Escritura directa de XLSX (sin openpyxl ni xlsxwriter).
+
+Cada hoja se serializa como texto XML a partir del DataFrame de la tienda
+(``construir_hoja``), con un styles.xml fijo que reproduce el formato de
+excel_exporter. ``escribir_xlsx`` arma el ZIP final con las hojas ya
+serializadas, así que las hojas se pueden construir en procesos separados.
+
+Las columnas de texto con pocos valores distintos (marca, color, tienda...)
+van a sharedStrings.xml: la tabla se arma una vez para todo el workbook
+(``preparar_compartidas``) y cada hoja sólo recibe los índices.
+"""
+
+import math
+import numbers
+import zipfile
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+import pandas as pd
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+
+# ======================================================
+# 🎨 ESTILOS (índices de cellXfs)
+# ======================================================
+
+S_VACIO = 0
+S_TITULO = 1
+S_TIENDA = 2
+S_FECHA = 3
+S_SEPARADOR = 4
+S_ETIQUETA = 5
+S_LINEA = 6
+S_CHECK_HEADER = 7
+S_HEADER_PICKING = 8
+S_CHECK = 9
+S_DATO = 10
+S_CHECK_ALT = 11
+S_DATO_ALT = 12
+S_HEADER_GENERAL = 13
+S_ETIQUETA_FIRMA = 14
+S_FECHA_DATO = 15
+S_FECHA_DATO_ALT = 16
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<styleSheet xmlns="{_NS_MAIN}">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd h:mm:ss"/></numFmts>'
+    '<fonts count="6">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="16"/><color rgb="00FFFFFF"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="12"/><color rgb="001F4E78"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><color rgb="00FFFFFF"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="10"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="7">'
+    '<fill><patternFill/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="001F4E78"/><bgColor rgb="001F4E78"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="00E8F4F8"/><bgColor rgb="00E8F4F8"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="004472C4"/><bgColor rgb="004472C4"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="00CCE5FF"/><bgColor rgb="00CCE5FF"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="00F9F9F9"/><bgColor rgb="00F9F9F9"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="4">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left/><right/><top/><bottom style="thin"><color rgb="00000000"/></bottom><diagonal/></border>'
+    '<border><left style="thin"><color rgb="00000000"/></left><right style="thin"><color rgb="00000000"/></right>'
+    '<top style="medium"><color rgb="00000000"/></top><bottom style="medium"><color rgb="00000000"/></bottom><diagonal/></border>'
+    '<border><left style="thin"><color rgb="00000000"/></left><right style="thin"><color rgb="00000000"/></right>'
+    '<top style="thin"><color rgb="00000000"/></top><bottom style="thin"><color rgb="00000000"/></bottom><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="17">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="2" fillId="3" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="left" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="3" fillId="3" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="right" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="4" fillId="4" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="5" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1">'
+    '<alignment horizontal="right" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="1" xfId="0" applyBorder="1"/>'
+    '<xf numFmtId="0" fontId="3" fillId="5" borderId="2" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="3" fillId="5" borderId="2" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center" wrapText="1"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="3" xfId="0" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="3" xfId="0" applyBorder="1" applyAlignment="1">'
+    '<alignment vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="6" borderId="3" xfId="0" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="6" borderId="3" xfId="0" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="3" fillId="5" borderId="3" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center" wrapText="1"/></xf>'
+    '<xf numFmtId="0" fontId="3" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1">'
+    '<alignment horizontal="right" vertical="center"/></xf>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="3" xfId="0" applyNumberFormat="1" applyBorder="1" applyAlignment="1">'
+    '<alignment vertical="center"/></xf>'
+    '<xf numFmtId="164" fontId="0" fillId="6" borderId="3" xfId="0" applyNumberFormat="1" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment vertical="center"/></xf>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+# ======================================================
+# 🔤 CELDAS
+# ======================================================
+
+# Letras de columna A..ZZ precalculadas; más allá se calculan al vuelo
+_LETRAS = tuple(get_column_letter(i) for i in range(1, 703))
+
+
+def _letra(col_idx):
+    """Letra de la columna ``col_idx`` (base 1)."""
+    if col_idx <= len(_LETRAS):
+        return _LETRAS[col_idx - 1]
+    return get_column_letter(col_idx)
+
+
+# Escape de texto XML con una tabla de traducción (str.translate, en C)
+_ESCAPE_XML = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
+def _texto(valor):
+    """Texto de celda escapado (sin caracteres de control inválidos en XML)."""
+    valor = ILLEGAL_CHARACTERS_RE.sub("", valor).translate(_ESCAPE_XML)
+    if valor[:1].isspace() or valor[-1:].isspace():
+        return f'<t xml:space="preserve">{valor}</t>'
+    return f"<t>{valor}</t>"
+
+
+def _cuerpo(valor):
+    """
+    Parte de la celda que depende sólo del valor (todo lo que sigue al
+    atributo ``s``). None/NaN -> celda vacía.
+
+    Primero se compara el tipo exacto de los casos comunes (str, int,
+    float); bool, tipos NumPy y subclases caen en las ramas isinstance.
+    """
+    tipo = type(valor)
+    if tipo is str:
+        return f' t="inlineStr"><is>{_texto(valor)}</is></c>'
+    if tipo is int:
+        return f"><v>{valor}</v></c>"
+    if tipo is float:
+        if math.isfinite(valor):
+            return f"><v>{valor:.16g}</v></c>"
+        return "/>"
+
+    if isinstance(valor, str):
+        return f' t="inlineStr"><is>{_texto(valor)}</is></c>'
+    if isinstance(valor, (bool, np.bool_)):
+        return f' t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, numbers.Real):
+        if isinstance(valor, numbers.Integral):
+            return f"><v>{int(valor)}</v></c>"
+        if math.isfinite(valor):
+            return f"><v>{float(valor):.16g}</v></c>"
+        return "/>"
+    if valor is None or valor is pd.NaT:
+        return "/>"
+    return f' t="inlineStr"><is>{_texto(str(valor))}</is></c>'
+
+
+def _celda(ref, valor, estilo):
+    """XML de una celda según el tipo del valor."""
+    return f'<c r="{ref}" s="{estilo}"{_cuerpo(valor)}'
+
+
+def _fila(num, celdas, alto=None):
+    if alto is None:
+        return f'<row r="{num}">{"".join(celdas)}</row>'
+    return f'<row r="{num}" ht="{alto}" customHeight="1">{"".join(celdas)}</row>'
+
+
+_EPOCA_EXCEL = pd.Timestamp("1899-12-30")
+
+
+def _cuerpos_columna(serie):
+    """
+    Cuerpos XML de una columna completa.
+
+    Cada valor distinto se serializa una sola vez (pd.factorize) y la
+    columna se arma indexando con los códigos; los nulos (código -1) caen en
+    la última posición, la celda vacía.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        # Fechas como número de serie de Excel (días desde 1899-12-30)
+        serie = (serie - _EPOCA_EXCEL) / pd.Timedelta(days=1)
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    cuerpos = np.array([_cuerpo(valor) for valor in unicos] + ["/>"], dtype=object)
+    return cuerpos[codigos]
+
+
+def _cuerpos_compartidos(indices):
+    """Cuerpos XML de una columna que referencia sharedStrings (-1 = vacía)."""
+    unicos, inversa = np.unique(indices, return_inverse=True)
+    cuerpos = np.array(
+        [f' t="s"><v>{i}</v></c>' if i >= 0 else "/>" for i in unicos.tolist()], dtype=object
+    )
+    return cuerpos[inversa]
+
+
+def _filas_datos(df, fila_inicio, col_inicio, estilo, estilo_alt, check=None, compartidas=None):
+    """
+    Filas de datos con color alterno (filas pares). Con ``check`` se agrega
+    la columna A de checkbox antes de los datos; ``compartidas`` trae los
+    índices de sharedStrings de las columnas que los usan.
+
+    Se arma por columnas sobre arrays de objetos (concatenación elemento a
+    elemento en NumPy) y se une todo con un solo join, sin bucle por fila.
+    """
+    n = len(df)
+    if n == 0:
+        return ""
+
+    filas = np.arange(fila_inicio, fila_inicio + n)
+    nums = filas.astype(str).astype(object)
+    alterna = filas % 2 == 0
+
+    def atributo_s(normal, alt):
+        return np.where(alterna, f'" s="{alt}"', f'" s="{normal}"').astype(object)
+
+    bloques = [('<row r="' + nums + '">')]
+    if check is not None:
+        bloques.append('<c r="A' + nums + atributo_s(*check) + ' t="inlineStr"><is><t>☐</t></is></c>')
+
+    s_datos = atributo_s(estilo, estilo_alt)
+    s_fechas = None
+    for j in range(len(df.columns)):
+        letra = _letra(col_inicio + j)
+        serie = df.iloc[:, j]
+        s_col = s_datos
+        if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+            if s_fechas is None:
+                s_fechas = atributo_s(S_FECHA_DATO, S_FECHA_DATO_ALT)
+            s_col = s_fechas
+        if compartidas is not None and df.columns[j] in compartidas:
+            cuerpos = _cuerpos_compartidos(compartidas[df.columns[j]].to_numpy())
+        else:
+            cuerpos = _cuerpos_columna(serie)
+        bloques.append('<c r="' + letra + nums + s_col + cuerpos)
+    bloques.append(np.full(n, "</row>", dtype=object))
+
+    return "".join(np.column_stack(bloques).ravel().tolist())
+
+
+def _cols(anchos):
+    return "<cols>" + "".join(
+        f'<col min="{i}" max="{i}" width="{ancho}" customWidth="1"/>'
+        for i, ancho in enumerate(anchos, start=1)
+    ) + "</cols>"
+
+
+def _header_footer(header, footer):
+    return (
+        f"<headerFooter><oddHeader>{header.translate(_ESCAPE_XML)}</oddHeader>"
+        f"<oddFooter>{footer.translate(_ESCAPE_XML)}</oddFooter></headerFooter>"
+    )
+
+# ======================================================
+# 📄 HOJAS
+# ======================================================
+
+# Filas 4-9 del header de control de picking: no dependen de la tienda
+_CONTROL_PICKING = "".join([
+    _fila(4, [_celda("A4", "━━━ CONTROL DE PICKING ━━━", S_SEPARADOR)], 20),
+    _fila(5, [], 5),
+    _fila(6, [
+        _celda("A6", "⏰ Hora Inicio:", S_ETIQUETA),
+        _celda("C6", None, S_LINEA),
+        _celda("D6", "⏰ Hora Final:", S_ETIQUETA),
+        _celda("F6", None, S_LINEA),
+    ], 20),
+    _fila(7, [], 5),
+    _fila(8, [_celda("A8", "👤 Encargado:", S_ETIQUETA)] + [
+        _celda(f"{letra}8", None, S_LINEA) for letra in "CDEF"
+    ], 20),
+    _fila(9, [], 10),
+])
+
+_XML_DECL = b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+def _hoja_picking(df, nombre_tienda, nombre_reporte, fecha, anchos, compartidas):
+    """Hoja de picking: header de control + datos + firma (mismo diseño que openpyxl)."""
+    fila_header = 10
+    ultima_fila = fila_header + 1 + len(df) + 2
+    ultima_col = _letra(max(len(df.columns) + 1, 6))
+
+    header_datos = [_celda("A10", "☐", S_CHECK_HEADER)] + [
+        _celda(f"{_letra(i)}10", str(col), S_HEADER_PICKING)
+        for i, col in enumerate(df.columns, start=2)
+    ]
+    merges = ["A1:F2", "A3:C3", "D3:F3", "A4:F4", "A6:B6", "D6:E6", "A8:B8", "C8:F8",
+              f"A{ultima_fila}:B{ultima_fila}", f"D{ultima_fila}:E{ultima_fila}"]
+
+    xml = bytearray(_XML_DECL)
+    xml += "".join([
+        f'<worksheet xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">',
+        '<sheetPr><pageSetUpPr fitToPage="1"/></sheetPr>',
+        f'<dimension ref="A1:{ultima_col}{ultima_fila}"/>',
+        '<sheetViews><sheetView workbookViewId="0">',
+        '<pane ySplit="10" topLeftCell="A11" activePane="bottomLeft" state="frozen"/>',
+        '<selection pane="bottomLeft" activeCell="A11" sqref="A11"/>',
+        '</sheetView></sheetViews>',
+        '<sheetFormatPr defaultRowHeight="15"/>',
+        _cols([4] + list(anchos)),
+        "<sheetData>",
+        _fila(1, [_celda("A1", f"🏢 JAGI - {nombre_reporte.upper()}", S_TITULO)], 25),
+        _fila(2, [], 25),
+        _fila(3, [
+            _celda("A3", f"📍 TIENDA: {nombre_tienda}", S_TIENDA),
+            _celda("D3", f"📅 Fecha: {fecha}", S_FECHA),
+        ], 20),
+        _CONTROL_PICKING,
+        _fila(fila_header, header_datos, 30),
+    ]).encode()
+    xml += _filas_datos(
+        df, fila_header + 1, 2, S_DATO, S_DATO_ALT,
+        check=(S_CHECK, S_CHECK_ALT), compartidas=compartidas,
+    ).encode()
+    xml += "".join([
+        _fila(ultima_fila, [
+            _celda(f"A{ultima_fila}", "✍️ Firma:", S_ETIQUETA_FIRMA),
+            _celda(f"C{ultima_fila}", None, S_LINEA),
+            _celda(f"D{ultima_fila}", "📅 Fecha:", S_ETIQUETA_FIRMA),
+            _celda(f"F{ultima_fila}", None, S_LINEA),
+        ], 25),
+        "</sheetData>",
+        f'<mergeCells count="{len(merges)}">',
+        "".join(f'<mergeCell ref="{m}"/>' for m in merges),
+        "</mergeCells>",
+        '<printOptions horizontalCentered="1"/>',
+        '<pageMargins left="0.5" right="0.5" top="0.75" bottom="0.75" header="0.5" footer="0.5"/>',
+        '<pageSetup orientation="portrait" fitToWidth="1" fitToHeight="0"/>',
+        _header_footer(f"&L{nombre_reporte}&R{nombre_tienda}", "&CPágina &P de &N"),
+        "</worksheet>",
+    ]).encode()
+    return bytes(xml)
+
+
+def _hoja_general(df, nombre_reporte, anchos, compartidas):
+    """Hoja general: header en la fila 1 + datos con color alterno."""
+    ultima_fila = len(df) + 1
+    ultima_col = _letra(len(df.columns))
+
+    header = [
+        _celda(f"{_letra(i)}1", str(col), S_HEADER_GENERAL)
+        for i, col in enumerate(df.columns, start=1)
+    ]
+
+    xml = bytearray(_XML_DECL)
+    xml += "".join([
+        f'<worksheet xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">',
+        '<sheetPr><pageSetUpPr fitToPage="1"/></sheetPr>',
+        f'<dimension ref="A1:{ultima_col}{ultima_fila}"/>',
+        '<sheetViews><sheetView workbookViewId="0">',
+        '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>',
+        '<selection pane="bottomLeft" activeCell="A2" sqref="A2"/>',
+        '</sheetView></sheetViews>',
+        '<sheetFormatPr defaultRowHeight="15"/>',
+        _cols(anchos),
+        "<sheetData>",
+        _fila(1, header, 40),
+    ]).encode()
+    xml += _filas_datos(df, 2, 1, S_DATO, S_DATO_ALT, compartidas=compartidas).encode()
+    xml += "".join([
+        "</sheetData>",
+        '<printOptions horizontalCentered="1"/>',
+        '<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/>',
+        '<pageSetup orientation="portrait" fitToWidth="1" fitToHeight="0"/>',
+        _header_footer(f"&LJAGI - {nombre_reporte}&RPágina &P de &N", "&CGenerado automáticamente"),
+        "</worksheet>",
+    ]).encode()
+    return bytes(xml)
+
+
+def construir_hoja(tarea):
+    """
+    Serializa una hoja a XML (bytes UTF-8).
+
+    ``tarea`` es una tupla ``(tipo_formato, df, nombre_hoja, nombre_reporte,
+    fecha, anchos, compartidas)``: un único argumento picklable para poder
+    repartir las hojas con ``ProcessPoolExecutor.map``. ``compartidas`` es
+    el DataFrame de índices de sharedStrings de las filas de la hoja (o None).
+    """
+    tipo_formato, df, nombre_hoja, nombre_reporte, fecha, anchos, compartidas = tarea
+    if tipo_formato == "picking":
+        return _hoja_picking(df, nombre_hoja, nombre_reporte, fecha, anchos, compartidas)
+    return _hoja_general(df, nombre_reporte, anchos, compartidas)
+
+# ======================================================
+# 🔁 SHARED STRINGS
+# ======================================================
+
+# Columnas con menos de esta proporción de valores distintos por fila van a
+# sharedStrings; las casi únicas (c_barra) quedan inline
+_MAX_PROPORCION_COMPARTIDAS = 0.3
+
+
+def preparar_compartidas(df):
+    """
+    Arma la tabla de sharedStrings del workbook.
+
+    Args:
+        df: DataFrame completo a exportar (todas las tiendas)
+
+    Returns:
+        Tupla (indices, cadenas, referencias):
+            - indices: DataFrame (mismo índice que df) con el índice en la
+              tabla de cada celda de las columnas compartidas (-1 = vacía),
+              o None si ninguna columna califica
+            - cadenas: lista de textos únicos, en orden de índice
+            - referencias: total de celdas que apuntan a la tabla
+    """
+    if df.empty:
+        return None, [], 0
+
+    proporcion = df.nunique(dropna=True) / len(df)
+    tabla = {}
+    indices = {}
+    referencias = 0
+
+    for col_name in df.columns[(proporcion < _MAX_PROPORCION_COMPARTIDAS).to_numpy()]:
+        serie = df[col_name]
+        if pd.api.types.infer_dtype(serie, skipna=True) != "string":
+            continue
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+        mapa = np.array([tabla.setdefault(valor, len(tabla)) for valor in unicos] + [-1])
+        indices[col_name] = mapa[codigos]
+        referencias += int((codigos >= 0).sum())
+
+    if not indices:
+        return None, [], 0
+    return pd.DataFrame(indices, index=df.index), list(tabla), referencias
+
+# ======================================================
+# 📦 ENSAMBLADO DEL ZIP
+# ======================================================
+
+def escribir_xlsx(archivo, hojas, cadenas=(), referencias=0):
+    """
+    Escribe el .xlsx con las hojas ya serializadas.
+
+    Args:
+        archivo: Ruta del archivo de salida
+        hojas: Lista de tuplas (nombre_hoja, xml_hoja) en el orden final,
+            con el XML en bytes
+        cadenas: Tabla de sharedStrings (de preparar_compartidas)
+        referencias: Total de celdas que usan la tabla
+    """
+    n = len(hojas)
+
+    content_types = "".join([
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">',
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>',
+        '<Default Extension="xml" ContentType="application/xml"/>',
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>',
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>',
+        '<Override PartName="/xl/sharedStrings.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        if cadenas else "",
+        "".join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, n + 1)
+        ),
+        "</Types>",
+    ])
+    rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<Relationships xmlns="{_NS_PKG_REL}">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    )
+    workbook = "".join([
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+        f'<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">',
+        "<bookViews><workbookView/></bookViews><sheets>",
+        "".join(
+            f'<sheet name={quoteattr(nombre)} sheetId="{i}" r:id="rId{i}"/>'
+            for i, (nombre, _) in enumerate(hojas, start=1)
+        ),
+        "</sheets></workbook>",
+    ])
+    workbook_rels = "".join([
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n',
+        f'<Relationships xmlns="{_NS_PKG_REL}">',
+        "".join(
+            f'<Relationship Id="rId{i}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, n + 1)
+        ),
+        f'<Relationship Id="rId{n + 1}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>',
+        f'<Relationship Id="rId{n + 2}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+        'Target="sharedStrings.xml"/>'
+        if cadenas else "",
+        "</Relationships>",
+    ])
+
+    # compresslevel=1: las hojas son XML muy repetitivo, comprimen casi igual
+    # que con el nivel por defecto y en bastante menos tiempo
+    with zipfile.ZipFile(archivo, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        zf.writestr("[Content_Types].xml", content_types)
+        zf.writestr("_rels/.rels", rels)
+        zf.writestr("xl/workbook.xml", workbook)
+        zf.writestr("xl/_rels/workbook.xml.rels", workbook_rels)
+        zf.writestr("xl/styles.xml", _STYLES_XML)
+        if cadenas:
+            shared = bytearray(_XML_DECL)
+            shared += "".join([
+                f'<sst xmlns="{_NS_MAIN}" count="{referencias}" uniqueCount="{len(cadenas)}">',
+                "".join(f"<si>{_texto(cadena)}</si>" for cadena in cadenas),
+                "</sst>",
+            ]).encode()
+            zf.writestr("xl/sharedStrings.xml", bytes(shared))
+        for i, (_, xml_hoja) in enumerate(hojas, start=1):
+            zf.writestr(f"xl/worksheets/sheet{i}.xml", xml_hoja)
@@ -2,8 +2,12 @@
 
 import pandas as pd
 
+from app.database import date_format_convert, date_subtract_days
+
 def get_top10_marca(conn, marca_norm):
-    query = """
+    # f_sistema_date (indexada) si existe; si no, conversión en línea
+    fecha_col = date_format_convert("h.f_sistema")
+    query = f"""
     SELECT 
         s.c_barra,
         s.d_marca,
@@ -12,7 +16,7 @@ def get_top10_marca(conn, marca_norm):
     FROM ventas_saldos_raw s
     INNER JOIN ventas_historico_raw h ON s.c_barra = h.c_barra
     WHERE UPPER(s.d_marca) LIKE ?
-      AND DATE(substr(h.f_sistema,7,4)||'-'||substr(h.f_sistema,4,2)||'-'||substr(h.f_sistema,1,2)) >= DATE('now', '-30 days')
+      AND {fecha_col} >= {date_subtract_days(30)}
     GROUP BY s.c_barra, s.d_marca, s.d_color_proveedor
     ORDER BY ventas_30d DESC
     LIMIT 10
@@ -20,6 +24,9 @@ def get_top10_marca(conn, marca_norm):
     return pd.read_sql(query, conn, params=(f"%{marca_norm}%",))
 
 def get_productos_marca_sin_ventas(conn, marca_norm):
+    # El LIKE con % inicial no puede usar índice: se evalúa sólo sobre las
+    # marcas distintas (recorriendo idx_ventas_saldos_marca, mucho más chico
+    # que la tabla) y las filas se buscan por igualdad con ese índice
     query = """
     SELECT DISTINCT
         c_barra,
@@ -27,7 +34,11 @@ def get_productos_marca_sin_ventas(conn, marca_norm):
         d_color_proveedor AS color,
         0 AS ventas_30d
     FROM ventas_saldos_raw
-    WHERE UPPER(d_marca) LIKE ?
+    WHERE d_marca IN (
+        SELECT DISTINCT d_marca
+        FROM ventas_saldos_raw
+        WHERE UPPER(d_marca) LIKE ?
+    )
     LIMIT 10
     """
     return pd.read_sql(query, conn, params=(f"%{marca_norm}%",))
@@ -40,10 +51,14 @@ def get_tiendas_configuradas(conn):
     """
     return pd.read_sql(query, conn)
 
-def get_stock_por_barra(conn, barra):
-    query = """
-    SELECT d_almacen, saldo_disponible
+def get_stock_por_barras(conn, barras):
+    """Stock por almacén de varios códigos en una sola consulta."""
+    if not barras:
+        return pd.DataFrame(columns=["c_barra", "d_almacen", "saldo_disponible"])
+    marcadores = ", ".join("?" * len(barras))
+    query = f"""
+    SELECT c_barra, d_almacen, saldo_disponible
     FROM ventas_saldos_raw
-    WHERE c_barra = ?
+    WHERE c_barra IN ({marcadores})
     """
-    return pd.read_sql(query, conn, params=(barra,))
\ No newline at end of file
+    return pd.read_sql(query, conn, params=tuple(barras))
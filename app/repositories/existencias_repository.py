@@ -15,8 +15,13 @@ def fetch_existencias_por_tienda():
         t.tipo_tienda,
         t.fija
     FROM ventas_saldos_raw s
-    LEFT JOIN config_tiendas t ON s.d_almacen = t.raw_name
-    ORDER BY t.clean_name, s.d_marca;
+    LEFT JOIN config_tiendas t ON s.d_almacen = t.raw_name;
     """
     with get_connection() as conn:
-        return pd.read_sql(query, conn)
\ No newline at end of file
+        df = pd.read_sql(query, conn)
+
+    # Mismo orden que el antiguo ORDER BY (NULL primero, empates en orden de
+    # lectura) sin que SQLite arme un sorter sobre todas las filas
+    return df.sort_values(
+        ["tienda", "d_marca"], na_position="first", kind="stable", ignore_index=True
+    )
@@ -1,20 +1,72 @@
 # app/repositories/redistribucion_repository.py
 
+from functools import lru_cache
+from types import MappingProxyType
+
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+from app.database import (
+    get_connection, date_format_convert, date_subtract_days_param,
+    param_placeholders
+)
+from app.utils.cache import register_cache
+from app.utils.text import _norm_series
+
+
+@register_cache
+@lru_cache(maxsize=1)
+def _load_configuracion():
+    """Lee las tablas de configuración (cacheado hasta invalidate_caches())."""
+    with get_connection() as conn:
+        return _read_configuracion(conn)
+
+
+def fetch_configuracion():
+    """
+    Devuelve la configuración cacheada. Referencias, marcas y excluidos son
+    tuplas (inmutables, se entregan tal cual); de los DataFrames se entregan
+    copias para que el llamador pueda modificarlos sin alterar la caché.
+    """
+    cfg, referencias, marcas, excluidos, tiendas = _load_configuracion()
+    return cfg.copy(), referencias, marcas, excluidos, tiendas.copy()
+
+
+@register_cache
+@lru_cache(maxsize=1)
+def fetch_mapas_configuracion():
+    """
+    Mapas derivados de la configuración, compartidos por los servicios:
+    stock mínimo por tipo (en minúsculas), región por tienda normalizada y
+    conjunto de tiendas fijas normalizadas. Se construyen una vez por carga
+    de la caché; los diccionarios se entregan como vistas de solo lectura.
+    """
+    cfg, _, _, _, tiendas = _load_configuracion()
 
-def fetch_configuracion(conn):
+    cfg_validos = cfg[cfg["cantidad"].notna()]
+    cfg_map = dict(zip(
+        cfg_validos["tipo"].astype(str).str.lower(),
+        cfg_validos["cantidad"].astype(int)
+    ))
+    region_map = dict(zip(tiendas["clean_norm"], tiendas["region"]))
+    fija_set = frozenset(tiendas.loc[tiendas["fija"] == 1, "clean_norm"])
+
+    return MappingProxyType(cfg_map), MappingProxyType(region_map), fija_set
+
+
+def _read_configuracion(conn):
     cfg = pd.read_sql("SELECT tipo, cantidad FROM stock_minimo_config", conn)
-    referencias = pd.read_sql(
+    referencias = tuple(pd.read_sql(
         "SELECT cod_barras FROM referencias_fijas", conn
-    )["cod_barras"].dropna().astype(str).tolist()
+    )["cod_barras"].dropna().astype(str))
 
-    marcas = pd.read_sql(
+    marcas = tuple(pd.read_sql(
         "SELECT marca FROM marcas_multimarca", conn
-    )["marca"].dropna().astype(str).tolist()
+    )["marca"].dropna().astype(str))
 
-    excluidos = pd.read_sql(
+    excluidos = tuple(pd.read_sql(
         "SELECT cod_barras FROM codigos_excluidos", conn
-    )["cod_barras"].dropna().astype(str).tolist()
+    )["cod_barras"].dropna().astype(str))
 
     tiendas = pd.read_sql(
         """SELECT raw_name, clean_name, region, fija, tipo_tienda
@@ -22,35 +74,141 @@ def fetch_configuracion(conn):
         WHERE COALESCE(activa, 1) = 1""",
         conn
     )
+    # Nombre normalizado: se calcula una sola vez por carga de la caché
+    tiendas["clean_norm"] = _norm_series(tiendas["clean_name"].fillna(""))
 
     return cfg, referencias, marcas, excluidos, tiendas
 
 
-def fetch_ventas(conn, fecha_col, fecha_desde):
-    return pd.read_sql_query(f"""
+@register_cache
+@lru_cache(maxsize=1)
+def _load_mapa_tiendas():
+    """
+    Mapeo raw_name -> clean_name de config_tiendas y conjunto de raw_name
+    de tiendas inactivas (cacheado hasta invalidate_caches()).
+    """
+    with get_connection() as conn:
+        tiendas = pd.read_sql(
+            """SELECT raw_name, clean_name, COALESCE(activa, 1) AS activa
+            FROM config_tiendas
+            WHERE raw_name IS NOT NULL""",
+            conn
+        )
+
+    con_nombre = tiendas[tiendas["clean_name"].notna()]
+    mapa = dict(zip(con_nombre["raw_name"], con_nombre["clean_name"]))
+    inactivas = frozenset(tiendas.loc[tiendas["activa"] != 1, "raw_name"])
+    return mapa, inactivas
+
+
+def _filtro_activas(columna):
+    """
+    Condición SQL (y sus parámetros) que descarta los almacenes inactivos
+    antes de leer las filas. Los almacenes sin nombre se conservan.
+    """
+    _, inactivas = _load_mapa_tiendas()
+    if not inactivas:
+        return "1 = 1", ()
+    return (
+        f"({columna} IS NULL OR {columna} NOT IN "
+        f"({param_placeholders(len(inactivas))}))",
+        tuple(sorted(inactivas)),
+    )
+
+
+def _mapear_tiendas(df):
+    """
+    Equivale al LEFT JOIN con config_tiendas: convierte tienda_raw en
+    tienda_clean (COALESCE(clean_name, raw_name)). Las tiendas inactivas ya
+    vienen filtradas en la consulta (_filtro_activas). tienda_raw es
+    category, así que el mapeo se hace sobre las categorías.
+    """
+    mapa, _ = _load_mapa_tiendas()
+
+    categorias = df["tienda_raw"].cat.categories
+    tienda_clean = df["tienda_raw"].map(
+        {c: mapa.get(c, c) for c in categorias}, na_action="ignore"
+    )
+    return df.rename(columns={"tienda_raw": "tienda_clean"}).assign(
+        tienda_clean=tienda_clean
+    )
+
+
+# Filas por bloque al leer ventas y saldos
+_FILAS_POR_BLOQUE = 100_000
+
+# Columnas de texto muy repetido (pocas tiendas/marcas por muchas filas)
+_COLUMNAS_CATEGORIA = ["tienda_raw", "c_barra", "d_marca"]
+
+
+def _leer_por_bloques(sql, conn, params=None):
+    """
+    Lee el resultado en bloques de _FILAS_POR_BLOQUE filas y pasa a category
+    las columnas de texto de cada bloque apenas llega, en vez de materializar
+    todo el resultado como objetos str antes de compactarlo.
+    """
+    bloques = []
+    for bloque in pd.read_sql_query(
+        sql, conn, params=params, chunksize=_FILAS_POR_BLOQUE
+    ):
+        for col in _COLUMNAS_CATEGORIA:
+            bloque[col] = bloque[col].astype("category")
+        bloques.append(bloque)
+
+    if len(bloques) == 1:
+        return bloques[0]
+
+    # pd.concat convertiría a object las category con categorías distintas
+    return pd.DataFrame({
+        col: (
+            union_categoricals([b[col] for b in bloques])
+            if col in _COLUMNAS_CATEGORIA
+            else pd.concat([b[col] for b in bloques], ignore_index=True)
+        )
+        for col in bloques[0].columns
+    })
+
+
+def _validar_fecha_col(fecha_col):
+    """
+    fecha_col se interpola en el SQL: solo se aceptan la columna precalculada
+    o la conversión en línea que genera date_format_convert.
+    """
+    permitidas = {"h.f_sistema_date", date_format_convert("h.f_sistema")}
+    if fecha_col not in permitidas:
+        raise ValueError(f"Columna de fecha no permitida: {fecha_col!r}")
+
+
+def fetch_ventas(conn, fecha_col, dias):
+    _validar_fecha_col(fecha_col)
+
+    # Se agrupa por el nombre crudo del almacén; el servicio vuelve a agrupar
+    # por tienda normalizada, así que dos raw_name con el mismo clean_name
+    # terminan sumados igual que antes. Las combinaciones con venta neta 0 se
+    # descartan en la BD: el servicio rellena con 0 las que no vienen.
+    activas, params_activas = _filtro_activas("h.d_almacen")
+    return _mapear_tiendas(_leer_por_bloques(f"""
         SELECT
-            COALESCE(ct.clean_name, h.d_almacen) AS tienda_clean,
             h.d_almacen AS tienda_raw,
             h.c_barra,
             h.d_marca,
             SUM(h.cn_venta) AS ventas_periodo
         FROM ventas_historico_raw h
-        LEFT JOIN config_tiendas ct ON h.d_almacen = ct.raw_name
-        WHERE {fecha_col} >= {fecha_desde}
-        AND COALESCE(ct.activa, 1) = 1
-        GROUP BY tienda_clean, h.c_barra, h.d_marca
-    """, conn)
+        WHERE {fecha_col} >= {date_subtract_days_param()}
+          AND {activas}
+        GROUP BY h.d_almacen, h.c_barra, h.d_marca
+        HAVING SUM(h.cn_venta) <> 0
+    """, conn, params=(int(dias),) + params_activas))
 
 
 def fetch_existencias(conn):
-    return pd.read_sql_query("""
+    activas, params_activas = _filtro_activas("s.d_almacen")
+    return _mapear_tiendas(_leer_por_bloques(f"""
         SELECT
-            COALESCE(ct.clean_name, s.d_almacen) AS tienda_clean,
             s.d_almacen AS tienda_raw,
             s.c_barra,
             s.d_marca,
             s.saldo_disponible AS stock_actual
         FROM ventas_saldos_raw s
-        LEFT JOIN config_tiendas ct ON s.d_almacen = ct.raw_name
-        WHERE COALESCE(ct.activa, 1) = 1
-    """, conn)
\ No newline at end of file
+        WHERE {activas}
+    """, conn, params=params_activas or None))
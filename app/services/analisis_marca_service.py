@@ -1,20 +1,34 @@
+import copy
+from datetime import datetime, timezone
+from functools import lru_cache
+
 import pandas as pd
 
 from app.repositories.analisis_marca_repository import (
     get_top10_marca,
     get_productos_marca_sin_ventas,
     get_tiendas_configuradas,
-    get_stock_por_barra,
+    get_stock_por_barras,
 )
 from app.database import get_connection
-from app.utils.text import _norm
+from app.utils.cache import register_cache
 
 
 def get_analisis_marca(marca: str) -> dict:
     """
     Logica de negocio para el analisis completo de una marca.
     Devuelve la estructura exacta que espera el frontend.
+
+    El resultado se cachea por marca y por día (la ventana de ventas es de
+    30 días hasta hoy) hasta invalidate_caches(); se entrega una copia.
     """
+    return copy.deepcopy(_analisis_marca(marca, datetime.now(timezone.utc).date()))
+
+
+@register_cache
+@lru_cache(maxsize=64)
+def _analisis_marca(marca: str, _fecha) -> dict:
+    """Calcula el análisis de la marca; ``_fecha`` solo forma parte de la clave."""
 
     with get_connection() as conn:
         marca_norm = marca.upper().strip()
@@ -34,11 +48,18 @@ def get_analisis_marca(marca: str) -> dict:
         top10_detalles = []
         tiendas_con_top10 = set()
 
-        # 3. Detalle por producto
+        # 3. Detalle por producto (stock de todo el top 10 en una consulta)
+        barras = list(dict.fromkeys(df_top10["c_barra"].astype(str)))
+        df_stocks = get_stock_por_barras(conn, barras)
+        stock_por_barra = dict(
+            tuple(df_stocks.groupby(df_stocks["c_barra"].astype(str), sort=False))
+        )
+        sin_stock = df_stocks.iloc[0:0]
+
         for _, fila in df_top10.iterrows():
             barra = str(fila["c_barra"])
 
-            df_stock = get_stock_por_barra(conn, barra)
+            df_stock = stock_por_barra.get(barra, sin_stock)
 
             tiendas_con_producto = [
                 tiendas_dict[r]
@@ -1,12 +1,24 @@
 # app/services/existencias_service.py
 
+from functools import lru_cache
+
 from app.repositories.existencias_repository import fetch_existencias_por_tienda
-from app.utils.text import _norm
+from app.utils.cache import register_cache
+
+
+@register_cache
+@lru_cache(maxsize=1)
+def _load_existencias_por_tienda():
+    """Existencias por tienda leídas de la BD (cacheado hasta invalidate_caches())."""
+    return fetch_existencias_por_tienda()
 
 
 def get_existencias_por_tienda():
     """
     Retorna las existencias actuales por tienda.
     Servicio del dominio Inventario / Existencias.
+
+    Se entrega una copia de la caché para que el llamador pueda filtrarla o
+    modificarla sin alterar las llamadas siguientes.
     """
-    return fetch_existencias_por_tienda()
\ No newline at end of file
+    return _load_existencias_por_tienda().copy()
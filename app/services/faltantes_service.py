@@ -3,7 +3,6 @@
 import pandas as pd
 from app.database import get_connection, date_subtract_days, date_format_convert
 from app.repositories import faltantes_repository as repo
-from app.utils.text import _norm
 
 
 def get_faltantes(dias=90):
@@ -39,26 +38,20 @@ def get_faltantes(dias=90):
     productos = ventas[["c_barra", "d_marca"]].drop_duplicates()
 
     # Lógica de negocio: detectar faltantes
-    faltantes = []
-
-    for _, prod in productos.iterrows():
-        c_barra = prod["c_barra"]
-        d_marca = prod["d_marca"]
-
-        tiendas_con_stock = (
-            existencias.loc[existencias["c_barra"] == c_barra, "tienda"]
-            .unique()
-            .tolist()
-        )
-
-        for tienda in tiendas_activas:
-            if tienda not in tiendas_con_stock:
-                faltantes.append({
-                    "c_barra": c_barra,
-                    "d_marca": d_marca,
-                    "tienda_faltante": tienda
-                })
-
-    return pd.DataFrame(faltantes).sort_values(
+    # Cada producto vendido en cada tienda activa, menos los pares que ya
+    # tienen fila de existencias (un código nulo nunca cuenta como presente)
+    candidatos = productos.merge(
+        pd.DataFrame({"tienda_faltante": tiendas_activas}), how="cross"
+    )
+    presentes = pd.MultiIndex.from_frame(
+        existencias.loc[existencias["c_barra"].notna(), ["c_barra", "tienda"]]
+    )
+    ya_presente = pd.MultiIndex.from_arrays(
+        [candidatos["c_barra"], candidatos["tienda_faltante"]]
+    ).isin(presentes)
+
+    faltantes = candidatos[~ya_presente].reset_index(drop=True)
+
+    return faltantes.sort_values(
         by=["d_marca", "tienda_faltante"]
-    )
\ No newline at end of file
+    )
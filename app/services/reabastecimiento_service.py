@@ -1,8 +1,232 @@
 # app/services/reabastecimiento_service.py
 
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 from app.database import get_connection, date_subtract_days, date_format_convert
-from app.utils.text import _norm
+from app.repositories.redistribucion_repository import (
+    fetch_configuracion, fetch_mapas_configuracion
+)
+from app.utils.cache import register_cache
+from app.utils.text import _clasificar, _mayusculas_series, _norm_series
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba es opcional
+    njit = None
+    prange = range
+
+
+# Estados de observación (antes de los iconos), en el orden de los códigos
+# de la columna categórica
+_OBSERVACIONES = ("OK", "COMPRA", "PARCIAL", "REABASTECER", "EXPANSION", "NUEVO")
+
+
+def _observacion(estado, n):
+    """Columna categórica de ``n`` filas con el mismo estado."""
+    return pd.Categorical.from_codes(
+        np.full(n, _OBSERVACIONES.index(estado)), categories=_OBSERVACIONES
+    )
+
+
+def _compilar(**opciones):
+    """
+    Decorador: compila la función con numba (con ``opciones``, p. ej.
+    parallel=True) si está instalado; si no, queda en Python.
+    """
+    def decorador(func):
+        if njit is None:
+            return func
+        return njit(cache=True, **opciones)(func)
+    return decorador
+
+
+@register_cache
+@lru_cache(maxsize=1)
+def _load_classification_sets():
+    """
+    Referencias fijas y marcas multimarca sin espacios extremos y en
+    mayúsculas. Se construyen una vez por carga de la configuración y se
+    descartan con invalidate_caches().
+    """
+    _, referencias_fijas, marcas_multimarca, _, _ = fetch_configuracion()
+    return (
+        frozenset(r.strip().upper() for r in referencias_fijas if r),
+        frozenset(m.strip().upper() for m in marcas_multimarca if m),
+    )
+
+
+def _stock_minimo(c_barra, d_marca, tienda_norm, ref_set, marca_set, tiendas_fijas_set, cfg_map):
+    """
+    Stock mínimo dinámico por fila, sobre Series completas.
+
+    Reglas en orden de prioridad: referencia fija (especial en tienda fija),
+    marca multimarca, JGL, JGM y default. Código y marca se comparan en
+    mayúsculas como texto (None -> "NONE", igual que str(valor).upper()),
+    clasificando cada código y cada marca distintos una sola vez.
+    """
+    es_ref, code_jgl, code_jgm = _clasificar(c_barra, [
+        lambda t: t.isin(ref_set),
+        lambda t: t.str.contains("JGL", regex=False),
+        lambda t: t.str.contains("JGM", regex=False),
+    ])
+    es_multimarca, marca_jgl, marca_jgm = _clasificar(d_marca, [
+        lambda t: t.isin(marca_set),
+        lambda t: t.str.contains("JGL", regex=False),
+        lambda t: t.str.contains("JGM", regex=False),
+    ])
+
+    condiciones = [
+        es_ref & tienda_norm.isin(tiendas_fijas_set).to_numpy(),
+        es_ref,
+        es_multimarca,
+        code_jgl | marca_jgl,
+        code_jgm | marca_jgm,
+    ]
+    valores = [
+        cfg_map.get("fijo_especial", 5),
+        cfg_map.get("fijo_normal", 5),
+        cfg_map.get("multimarca", 2),
+        cfg_map.get("jgl", 3),
+        cfg_map.get("jgm", 3),
+    ]
+    return np.select(condiciones, valores, default=cfg_map.get("default", 4))
+
+
+# ======================================================
+# ⚙️ MOTOR DE ASIGNACIÓN DE STOCK DE BODEGA
+# ======================================================
+
+@_compilar(parallel=True)
+def _asignar_stock(demanda, forzado, stock_inicial, inicios, asignado, restante):
+    """
+    Reparte el stock de bodega dentro de cada grupo (código de barras).
+
+    Las filas llegan ordenadas por grupo y, dentro del grupo, en orden de
+    asignación; el grupo g ocupa [inicios[g], inicios[g + 1]) y parte con
+    stock_inicial[g]. Las filas sin demanda se saltan. Sin stock, una fila
+    forzada (NUEVO) recibe su demanda completa sin consumir y una normal
+    corta el grupo. Las comparaciones están escritas a mano (no min/max)
+    para que un NaN se propague igual que en el bucle por filas original.
+
+    Cada grupo solo escribe su propio tramo, así que con numba los grupos
+    se reparten entre hilos (prange) sin bloqueos.
+    """
+    for g in prange(len(inicios) - 1):
+        stock = stock_inicial[g]
+        for i in range(inicios[g], inicios[g + 1]):
+            d = demanda[i]
+            if d <= 0:
+                continue
+            if stock <= 0:
+                if not forzado[i]:
+                    break
+                asignado[i] = d
+                continue
+            a = stock if stock < d else d
+            asignado[i] = a
+            stock -= a
+        restante[inicios[g]:inicios[g + 1]] = stock
+
+
+def _motor_asignacion(df, filas, prioridad=None, forzado=None):
+    """
+    Corre _asignar_stock sobre las filas ``filas`` (posiciones) de df.
+
+    Se agrupa por c_barra (las filas sin código quedan fuera, como en
+    groupby). Dentro de cada código se recorre por ``prioridad`` descendente
+    o, sin ella, en el orden de df; los empates conservan el orden de df.
+    El stock inicial es el stock_bodega de la primera fila del código en df.
+
+    Trabaja por posición sobre arreglos y devuelve (asignado, restante) en
+    float64 para toda la tabla; quien llama escribe cada columna una vez.
+    """
+    # Copias: se modifican antes de escribirlas de vuelta en df
+    asignado = df["cantidad_asignada_real"].to_numpy(dtype=np.float64, copy=True)
+    restante = df["stock_bodega_restante"].to_numpy(dtype=np.float64, copy=True)
+    if len(filas) == 0:
+        return asignado, restante
+
+    codigos = pd.factorize(df["c_barra"].to_numpy()[filas])[0]
+    filas = filas[codigos >= 0]
+    codigos = codigos[codigos >= 0]
+
+    if prioridad is None:
+        orden = np.argsort(codigos, kind="stable")
+    else:
+        orden = np.lexsort((-prioridad[filas], codigos))
+    filas_ord = filas[orden]
+    codigos_ord = codigos[orden]
+
+    # Primera fila de cada código en el orden de df (codigos viene de
+    # factorize: el código k aparece por primera vez antes que el k + 1)
+    _, primeras = np.unique(codigos, return_index=True)
+    stock_inicial = df["stock_bodega"].to_numpy(dtype=np.float64)[filas[primeras]]
+
+    inicios = np.concatenate((
+        [0], np.flatnonzero(np.diff(codigos_ord)) + 1, [len(codigos_ord)]
+    )).astype(np.int64)
+
+    if forzado is None:
+        forzado_ord = np.zeros(len(filas_ord), dtype=np.bool_)
+    else:
+        forzado_ord = forzado[filas_ord]
+
+    demanda_ord = df["cantidad_a_despachar"].to_numpy(dtype=np.float64)[filas_ord]
+
+    # Sin demanda, o sin stock y sin filas forzadas, nadie recibe nada: cada
+    # código queda con su stock inicial y no hace falta correr el motor.
+    # Se compara con <= 0 porque un NaN (demanda o stock) sí pasa por el motor
+    sin_asignacion = (
+        (demanda_ord <= 0).all()
+        or (not forzado_ord.any() and (stock_inicial <= 0).all())
+    )
+    if sin_asignacion:
+        restante[filas_ord] = np.repeat(stock_inicial, np.diff(inicios))
+        return asignado, restante
+
+    asignado_ord = asignado[filas_ord]
+    restante_ord = restante[filas_ord]
+
+    _asignar_stock(
+        demanda_ord, forzado_ord, stock_inicial, inicios, asignado_ord, restante_ord
+    )
+
+    asignado[filas_ord] = asignado_ord
+    restante[filas_ord] = restante_ord
+    return asignado, restante
+
+
+def _asignar_columna(df, columna, valores):
+    """
+    Escribe ``valores`` (float64) en la columna. Si la columna era entera y
+    todos los valores son enteros exactos se conserva el dtype entero, igual
+    que con las asignaciones por fila de pandas.
+    """
+    dtype = df[columna].dtype
+    if (
+        pd.api.types.is_integer_dtype(dtype)
+        and np.isfinite(valores).all()
+        and (valores == np.trunc(valores)).all()
+    ):
+        valores = valores.astype(dtype)
+    df[columna] = valores
+
+
+def _leer_sql(conn, query, categorias=()):
+    """
+    Lee una consulta directo del cursor a un DataFrame (sin la capa de
+    pd.read_sql). Las columnas en ``categorias`` (texto muy repetido, como
+    la tienda) se guardan como category.
+    """
+    resultado = conn.exec_driver_sql(query)
+    df = pd.DataFrame.from_records(
+        resultado.fetchall(), columns=list(resultado.keys()), coerce_float=True
+    )
+    for col in categorias:
+        df[col] = df[col].astype("category")
+    return df
 
 
 def get_reabastecimiento_avanzado(
@@ -22,51 +246,26 @@ def get_reabastecimiento_avanzado(
     # =========================
     # CARGA BASE DE DATOS
     # =========================
-    with get_connection() as conn:
-
-        df_cfg = pd.read_sql("SELECT tipo, cantidad FROM stock_minimo_config", conn)
-        cfg_map = {
-            str(r["tipo"]).lower(): int(r["cantidad"])
-            for _, r in df_cfg.iterrows()
-            if pd.notna(r["cantidad"])
-        }
-
-        referencias_fijas = pd.read_sql(
-            "SELECT cod_barras FROM referencias_fijas", conn
-        )["cod_barras"].dropna().astype(str).tolist()
-
-        marcas_multimarca = pd.read_sql(
-            "SELECT marca FROM marcas_multimarca", conn
-        )["marca"].dropna().astype(str).tolist()
-
-        codigos_excluidos = pd.read_sql(
-            "SELECT cod_barras FROM codigos_excluidos", conn
-        )["cod_barras"].dropna().astype(str).tolist()
+    # Tablas de configuración: cacheadas hasta invalidate_caches()
+    _, _, _, codigos_excluidos, config_tiendas = (
+        fetch_configuracion()
+    )
+    cfg_map, region_map, tiendas_fijas_set = fetch_mapas_configuracion()
 
-        config_tiendas = pd.read_sql("""
-            SELECT 
-                raw_name, 
-                clean_name, 
-                region, 
-                fija, 
-                tipo_tienda,
-                COALESCE(activa, 1) as activa
-            FROM config_tiendas
-            WHERE COALESCE(activa, 1) = 1
-        """, conn)
+    with get_connection() as conn:
 
         # logging.info(f"🏪 Tiendas activas: {len(config_tiendas)}")
 
         # -------------------------
         # STOCK TOTAL REAL DE BODEGA (CLAVE)
         # -------------------------
-        df_bodega_total = pd.read_sql("""
+        df_bodega_total = _leer_sql(conn, """
             SELECT 
                 c_barra,
                 SUM(saldo_disponibles) AS stock_bodega_total
             FROM inventario_bodega_raw
             GROUP BY c_barra
-        """, conn)
+        """)
 
         df_bodega_total["c_barra"] = (
             df_bodega_total["c_barra"]
@@ -82,12 +281,42 @@ def get_reabastecimiento_avanzado(
         )
 
         # -------------------------
-        # REABASTECIMIENTO BASE
+        # VENTAS: PERÍODO Y EXPANSIÓN (UN SOLO RECORRIDO)
         # -------------------------
-        fecha_desde_reab = date_subtract_days(dias_reab)
+        # Las dos ventanas salen de una sola lectura de ventas_historico_raw,
+        # agrupada por (código, tienda) en una tabla temporal. en_reab y
+        # en_exp marcan los grupos con filas en cada ventana, es decir, los
+        # que devolvía cada consulta por separado; la expansión solo cuenta
+        # tiendas activas.
         fecha_col = date_format_convert("h.f_sistema")
+        fecha_desde_reab = date_subtract_days(dias_reab)
+        fecha_desde_exp = date_subtract_days(dias_exp)
+        en_ventana_reab = f"{fecha_col} >= {fecha_desde_reab}"
+        en_ventana_exp = (
+            f"{fecha_col} >= {fecha_desde_exp} "
+            "AND (ct.activa IS NULL OR COALESCE(ct.activa, 1) = 1)"
+        )
+
+        conn.exec_driver_sql("DROP TABLE IF EXISTS tmp_ventas_reab")
+        conn.exec_driver_sql(f"""
+        CREATE TEMP TABLE tmp_ventas_reab AS
+        SELECT 
+            h.c_barra,
+            COALESCE(ct.clean_name, h.d_almacen) AS tienda,
+            SUM(CASE WHEN {en_ventana_reab} THEN h.cn_venta END) AS ventas_periodo,
+            MAX(CASE WHEN {en_ventana_reab} THEN 1 ELSE 0 END) AS en_reab,
+            SUM(CASE WHEN {en_ventana_exp} THEN h.cn_venta END) AS ventas_expansion,
+            MAX(CASE WHEN {en_ventana_exp} THEN 1 ELSE 0 END) AS en_exp
+        FROM ventas_historico_raw h
+        LEFT JOIN config_tiendas ct ON h.d_almacen = ct.raw_name
+        WHERE {fecha_col} >= {date_subtract_days(max(dias_reab, dias_exp))}
+        GROUP BY h.c_barra, tienda
+        """)
 
-        query = f"""
+        # -------------------------
+        # REABASTECIMIENTO BASE
+        # -------------------------
+        query = """
         WITH base AS (
             SELECT 
                 s.c_barra,
@@ -101,16 +330,6 @@ def get_reabastecimiento_avanzado(
             LEFT JOIN config_tiendas ct ON s.d_almacen = ct.raw_name
             WHERE s.c_barra NOT IN (SELECT cod_barras FROM codigos_excluidos)
                 AND (ct.activa IS NULL OR COALESCE(ct.activa, 1) = 1)
-        ),
-        ventas_reab AS (
-            SELECT 
-                h.c_barra,
-                COALESCE(ct.clean_name, h.d_almacen) AS tienda,
-                SUM(h.cn_venta) AS ventas_periodo
-            FROM ventas_historico_raw h
-            LEFT JOIN config_tiendas ct ON h.d_almacen = ct.raw_name
-            WHERE {fecha_col} >= {fecha_desde_reab}
-            GROUP BY h.c_barra, tienda
         )
         SELECT 
             base.c_barra,
@@ -121,32 +340,24 @@ def get_reabastecimiento_avanzado(
             base.stock_bodega,
             COALESCE(v.ventas_periodo, 0) AS ventas_periodo
         FROM base
-        LEFT JOIN ventas_reab v
-            ON base.c_barra = v.c_barra AND base.tienda = v.tienda;
+        LEFT JOIN tmp_ventas_reab v
+            ON base.c_barra = v.c_barra AND base.tienda = v.tienda
+            AND v.en_reab = 1;
         """
-        df = pd.read_sql(query, conn)
+        df = _leer_sql(conn, query)
 
         # -------------------------
         # EXPANSIÓN (VENTAS LARGAS)
         # -------------------------
-        fecha_desde_exp = date_subtract_days(dias_exp)
+        df_exp = _leer_sql(conn, """
+            SELECT c_barra, tienda, ventas_expansion
+            FROM tmp_ventas_reab
+            WHERE en_exp = 1
+        """, categorias=("tienda",))
 
-        query_exp = f"""
-        SELECT 
-            h.c_barra,
-            COALESCE(ct.clean_name, h.d_almacen) AS tienda,
-            SUM(h.cn_venta) AS ventas_expansion
-        FROM ventas_historico_raw h
-        LEFT JOIN config_tiendas ct ON h.d_almacen = ct.raw_name
-        WHERE {fecha_col} >= {fecha_desde_exp}
-            AND (ct.activa IS NULL OR COALESCE(ct.activa, 1) = 1)
-        GROUP BY h.c_barra, tienda
-        """
-        df_exp = pd.read_sql(query_exp, conn)
+        conn.exec_driver_sql("DROP TABLE tmp_ventas_reab")
 
-        tiendas_all = config_tiendas[
-            config_tiendas["activa"] == 1
-        ]["clean_name"].dropna().unique().tolist()
+        tiendas_all = config_tiendas["clean_name"].dropna().unique().tolist()
 
         info_ref = pd.read_sql("""
             SELECT DISTINCT c_barra, d_marca, d_color_proveedor AS color
@@ -154,244 +365,202 @@ def get_reabastecimiento_avanzado(
             WHERE c_barra IS NOT NULL
         """, conn)
 
-        df_existencias = pd.read_sql("""
+        # La tienda solo se usa normalizada: sin nombre queda '' (= _norm(None))
+        df_existencias = _leer_sql(conn, """
             SELECT DISTINCT 
-                COALESCE(ct.clean_name, s.d_almacen) AS tienda,
+                COALESCE(ct.clean_name, s.d_almacen, '') AS tienda,
                 s.c_barra
             FROM ventas_saldos_raw s
             LEFT JOIN config_tiendas ct ON s.d_almacen = ct.raw_name
-        """, conn)
+        """, categorias=("tienda",))
 
     # =========================
     # NORMALIZACIÓN
     # =========================
-    config_tiendas["clean_norm"] = config_tiendas["clean_name"].fillna("").apply(_norm)
-    region_map = dict(zip(config_tiendas["clean_norm"], config_tiendas["region"]))
-
-    tiendas_fijas_set = set(
-        config_tiendas.loc[config_tiendas["fija"] == 1, "clean_norm"]
-    )
-
-    df["tienda_norm"] = df["tienda"].fillna("").apply(_norm)
+    df["tienda_norm"] = _norm_series(df["tienda"].fillna(""))
     df["region"] = df["tienda_norm"].map(region_map).fillna("SIN REGION")
 
-    df = df[~df["tienda"].str.contains("bodega jagi", case=False, na=False)]
+    # La búsqueda de texto se hace una vez por tienda distinta, no por fila
+    codigos_tienda, tiendas_unicas = pd.factorize(df["tienda"])
+    es_bodega = (
+        pd.Series(tiendas_unicas, dtype=object)
+        .str.contains("bodega jagi", case=False, na=False)
+        .to_numpy(dtype=bool)[codigos_tienda]
+        & (codigos_tienda >= 0)
+    )
+    df = df[~es_bodega]
     tiendas_all = [t for t in tiendas_all if "bodega jagi" not in t.lower()]
 
-    ref_set = set(r.strip().upper() for r in referencias_fijas if r)
-    marca_set = set(m.strip().upper() for m in marcas_multimarca if m)
+    ref_set, marca_set = _load_classification_sets()
 
     # =========================
     # STOCK MÍNIMO DINÁMICO
     # =========================
-    def calcular_stock_min(row):
-        code = str(row["c_barra"]).upper()
-        marca = str(row["d_marca"]).upper()
+    df["stock_minimo_dinamico"] = _stock_minimo(
+        df["c_barra"], df["d_marca"], df["tienda_norm"],
+        ref_set, marca_set, tiendas_fijas_set, cfg_map
+    )
 
-        if code in ref_set:
-            return cfg_map.get(
-                "fijo_especial" if row["tienda_norm"] in tiendas_fijas_set else "fijo_normal", 5
-            )
-        if marca in marca_set:
-            return cfg_map.get("multimarca", 2)
-        if "JGL" in code or "JGL" in marca:
-            return cfg_map.get("jgl", 3)
-        if "JGM" in code or "JGM" in marca:
-            return cfg_map.get("jgm", 3)
-        return cfg_map.get("default", 4)
-
-    df["stock_minimo_dinamico"] = df.apply(calcular_stock_min, axis=1)
-
-    df["cantidad_a_despachar"] = df.apply(
-        lambda r: max(r["stock_minimo_dinamico"] - (r["stock_actual"] or 0), 0)
-        if (r["ventas_periodo"] > 0 or r["c_barra"].upper() in ref_set)
-        else 0,
-        axis=1
+    # Solo se pide stock con ventas en el período o si es referencia fija.
+    # np.maximum propaga NaN (stock_actual nulo) igual que max(nan, 0)
+    con_demanda = (
+        (df["ventas_periodo"] > 0)
+        | _clasificar(df["c_barra"], [lambda t: t.isin(ref_set)])[0]
+    )
+    df["cantidad_a_despachar"] = np.where(
+        con_demanda,
+        np.maximum(df["stock_minimo_dinamico"] - df["stock_actual"], 0),
+        0
     )
 
     # =========================
     # MOTOR DE ASIGNACIÓN REABASTECIMIENTO
     # =========================
-    df["es_tienda_fija"] = df["tienda_norm"].isin(tiendas_fijas_set).astype(int)
+    df["es_tienda_fija"] = df["tienda_norm"].isin(tiendas_fijas_set).astype(np.int8)
     df["prioridad_tienda"] = df["es_tienda_fija"] * 100 + df["ventas_periodo"]
 
     df["cantidad_asignada_real"] = 0
     df["stock_bodega_restante"] = df["stock_bodega"]
 
-    for c_barra, grupo in df.groupby("c_barra"):
-        stock = grupo["stock_bodega"].iloc[0]
-        grupo_ord = grupo.sort_values("prioridad_tienda", ascending=False)
-
-        for idx, row in grupo_ord.iterrows():
-            if stock <= 0:
-                break
-            demanda = row["cantidad_a_despachar"]
-            if demanda <= 0:
-                continue
-
-            asignado = min(demanda, stock)
-            df.loc[idx, "cantidad_asignada_real"] = asignado
-            stock -= asignado
-
-        df.loc[grupo.index, "stock_bodega_restante"] = stock
+    # Cada código reparte su stock de bodega de mayor a menor prioridad
+    asignado, restante = _motor_asignacion(
+        df, np.arange(len(df)), prioridad=df["prioridad_tienda"].to_numpy()
+    )
+    _asignar_columna(df, "cantidad_asignada_real", asignado)
+    _asignar_columna(df, "stock_bodega_restante", restante)
 
     # =========================
     # OBSERVACIÓN BASE
     # =========================
-    df["observacion"] = df.apply(
-        lambda r: "OK"
-        if r["cantidad_a_despachar"] == 0
-        else "COMPRA"
-        if r["cantidad_asignada_real"] == 0
-        else "PARCIAL"
-        if r["cantidad_asignada_real"] < r["cantidad_a_despachar"]
-        else "REABASTECER",
-        axis=1
+    solicitada = df["cantidad_a_despachar"]
+    asignada = df["cantidad_asignada_real"]
+    # Categórica: las máscaras y los iconos trabajan sobre códigos
+    df["observacion"] = pd.Categorical.from_codes(
+        np.select(
+            [solicitada == 0, asignada == 0, asignada < solicitada],
+            [0, 1, 2],  # OK, COMPRA, PARCIAL
+            default=3   # REABASTECER
+        ),
+        categories=_OBSERVACIONES
     )
 
     # =========================
     # EXPANSIÓN + NUEVOS (FILAS)
     # =========================
-    df_existencias["tienda_norm"] = df_existencias["tienda"].apply(_norm)
-    df_existencias["c_barra_up"] = df_existencias["c_barra"].astype(str).str.upper()
-    existentes = set(zip(df_existencias["tienda_norm"], df_existencias["c_barra_up"]))
+    # Los bloques nuevos se juntan y se agregan a df con un solo concat
+    partes = [df]
+
+    df_existencias["tienda_norm"] = _norm_series(df_existencias["tienda"])
+    df_existencias["c_barra_up"] = _mayusculas_series(df_existencias["c_barra"])
+    existentes = pd.MultiIndex.from_frame(df_existencias[["tienda_norm", "c_barra_up"]])
 
-    exp_rows = []
+    # Marca y color: primera aparición de cada código en ventas_saldos_raw
+    info_ref["c_barra_up"] = _mayusculas_series(info_ref["c_barra"])
+    info_ref = info_ref.drop_duplicates("c_barra_up").set_index("c_barra_up")[["d_marca", "color"]]
 
     df_exp_validas = df_exp[
         (df_exp["ventas_expansion"] >= ventas_min_exp)
         & (~df_exp["c_barra"].isin(codigos_excluidos))
     ]
 
-    for _, row in df_exp_validas.iterrows():
-        code = row["c_barra"].upper()
-        stock_real = stock_bodega_map.get(code, 0)
-
-        info = info_ref[info_ref["c_barra"].astype(str).str.upper() == code]
-        marca = info["d_marca"].iloc[0] if not info.empty else "SIN MARCA"
-        color = info["color"].iloc[0] if not info.empty else "SIN COLOR"
-
-        for tienda in tiendas_all:
-            tn = _norm(tienda)
-            if (tn, code) in existentes:
-                continue
+    # Una sola búsqueda por índice para todos los códigos; los que no están
+    # en info_ref llevan SIN MARCA / SIN COLOR (un NULL encontrado se respeta)
+    codigos_exp = df_exp_validas["c_barra"].str.upper()
+    con_info = codigos_exp.isin(info_ref.index).to_numpy()
+    info_exp = info_ref.reindex(codigos_exp)
+    productos_exp = pd.DataFrame({
+        "c_barra": codigos_exp.to_numpy(),
+        "d_marca": info_exp["d_marca"].where(con_info, "SIN MARCA").to_numpy(),
+        "color": info_exp["color"].where(con_info, "SIN COLOR").to_numpy(),
+        "stock_bodega": [stock_bodega_map.get(code, 0) for code in codigos_exp],
+    })
 
-            stock_min = cfg_map.get("default", 4)
+    tiendas_df = pd.DataFrame({"tienda": tiendas_all})
+    tiendas_df["tienda_norm"] = _norm_series(tiendas_df["tienda"])
+    tiendas_df["region"] = [region_map.get(tn, "SIN REGION") for tn in tiendas_df["tienda_norm"]]
+
+    # Cada producto válido × cada tienda activa, sin los pares que ya existen
+    df_exp_filas = productos_exp.merge(tiendas_df, how="cross")
+    ya_existe = pd.MultiIndex.from_arrays(
+        [df_exp_filas["tienda_norm"], df_exp_filas["c_barra"]]
+    ).isin(existentes)
+    df_exp_filas = df_exp_filas[~ya_existe]
+
+    if not df_exp_filas.empty:
+        stock_min = cfg_map.get("default", 4)
+        df_exp_filas = pd.DataFrame({
+            "region": df_exp_filas["region"],
+            "tienda": df_exp_filas["tienda"],
+            "tienda_norm": df_exp_filas["tienda_norm"],
+            "c_barra": df_exp_filas["c_barra"],
+            "d_marca": df_exp_filas["d_marca"],
+            "color": df_exp_filas["color"],
+            "ventas_periodo": 0,
+            "stock_actual": 0,
+            "stock_bodega": df_exp_filas["stock_bodega"],
+            "stock_bodega_restante": df_exp_filas["stock_bodega"],
+            "stock_minimo_dinamico": stock_min,
+            "cantidad_asignada_real": 0,
+            "cantidad_a_despachar": stock_min,
+            "observacion": _observacion("EXPANSION", len(df_exp_filas))
+        })
+        partes.append(df_exp_filas)
 
-            exp_rows.append({
-                "region": region_map.get(tn, "SIN REGION"),
-                "tienda": tienda,
-                "tienda_norm": tn,
-                "c_barra": code,
-                "d_marca": marca,
-                "color": color,
+    # =========================
+    # NUEVOS CÓDIGOS (FILAS)
+    # =========================
+    if nuevos_codigos:
+        # Una fila por código con sus datos y luego código × tienda activa
+        codigos_nuevos = [str(c.get("c_barra")).upper() for c in nuevos_codigos]
+        productos_nuevos = pd.DataFrame({
+            "c_barra": codigos_nuevos,
+            "d_marca": [c.get("d_marca", "SIN MARCA") for c in nuevos_codigos],
+            "color": [c.get("color", "SIN COLOR") for c in nuevos_codigos],
+            "stock_bodega": [stock_bodega_map.get(code, 0) for code in codigos_nuevos],
+        })
+        df_nuevos = productos_nuevos.merge(tiendas_df, how="cross")
+
+        if not df_nuevos.empty:
+            stock_min = _stock_minimo(
+                df_nuevos["c_barra"], df_nuevos["d_marca"], df_nuevos["tienda_norm"],
+                ref_set, marca_set, tiendas_fijas_set, cfg_map
+            )
+            df_nuevos = pd.DataFrame({
+                "region": df_nuevos["region"],
+                "tienda": df_nuevos["tienda"],
+                "tienda_norm": df_nuevos["tienda_norm"],
+                "c_barra": df_nuevos["c_barra"],
+                "d_marca": df_nuevos["d_marca"],
+                "color": df_nuevos["color"],
                 "ventas_periodo": 0,
                 "stock_actual": 0,
-                "stock_bodega": stock_real,
-                "stock_bodega_restante": stock_real,
-                "stock_minimo_dinamico": stock_min,
+                "stock_bodega": df_nuevos["stock_bodega"],
+                "stock_bodega_restante": df_nuevos["stock_bodega"],
                 "cantidad_asignada_real": 0,
+                "stock_minimo_dinamico": stock_min,
                 "cantidad_a_despachar": stock_min,
-                "observacion": "EXPANSION"
+                "observacion": _observacion("NUEVO", len(df_nuevos))
             })
+            partes.append(df_nuevos)
 
-    if exp_rows:
-        df = pd.concat([df, pd.DataFrame(exp_rows)], ignore_index=True)
-
-    # =========================
-    # MOTOR EXPANSIÓN
-    # =========================
-    mask_exp = df["observacion"] == "EXPANSION"
-
-    for c_barra, grupo in df[mask_exp].groupby("c_barra"):
-        stock = grupo["stock_bodega"].iloc[0]
-
-        for idx, row in grupo.iterrows():
-            if stock <= 0:
-                break
-
-            demanda = row["cantidad_a_despachar"]
-            asignado = min(demanda, stock)
-
-            df.loc[idx, "cantidad_asignada_real"] = asignado
-            stock -= asignado
-
-        df.loc[grupo.index, "stock_bodega_restante"] = stock
-
-
-    # =========================
-    # NUEVOS CÓDIGOS (FILAS)
-    # =========================
-    if nuevos_codigos:
-        nuevos_rows = []
-
-        for c in nuevos_codigos:
-            code = str(c.get("c_barra")).upper()
-            marca = c.get("d_marca", "SIN MARCA")
-            color = c.get("color", "SIN COLOR")
-
-            stock_real = stock_bodega_map.get(code, 0)
-
-            for tienda in tiendas_all:
-                tn = _norm(tienda)
-
-                stock_min = calcular_stock_min({
-                    "c_barra": code,
-                    "d_marca": marca,
-                    "tienda_norm": tn
-                })
-
-                nuevos_rows.append({
-                    "region": region_map.get(tn, "SIN REGION"),
-                    "tienda": tienda,
-                    "tienda_norm": tn,
-                    "c_barra": code,
-                    "d_marca": marca,
-                    "color": color,
-                    "ventas_periodo": 0,
-                    "stock_actual": 0,
-                    "stock_bodega": stock_real,
-                    "stock_bodega_restante": stock_real,
-                    "stock_minimo_dinamico": stock_min,
-                    "cantidad_asignada_real": 0,
-                    "cantidad_a_despachar": stock_min,
-                    "observacion": "NUEVO"
-                })
-
-        if nuevos_rows:
-            df = pd.concat([df, pd.DataFrame(nuevos_rows)], ignore_index=True)
+    if len(partes) > 1:
+        df = pd.concat(partes, ignore_index=True)
 
     # =========================
     # MOTOR ASIGNACIÓN EXPANSION + NUEVO
     # =========================
-    mask_especial = df["observacion"].isin(["EXPANSION", "NUEVO"])
-
-    for c_barra, grupo in df[mask_especial].groupby("c_barra"):
-        stock = grupo["stock_bodega"].iloc[0]
-
-        for idx, row in grupo.iterrows():
-            demanda = row["cantidad_a_despachar"]
-            if demanda <= 0:
-                continue
-
-            # EXPANSION → solo si hay stock
-            if row["observacion"] == "EXPANSION":
-                if stock <= 0:
-                    break
-                asignado = min(demanda, stock)
-                stock -= asignado
-
-            # NUEVO → si hay stock lo consume, si no, fuerza asignación
-            else:  # NUEVO
-                if stock > 0:
-                    asignado = min(demanda, stock)
-                    stock -= asignado
-                else:
-                    asignado = demanda  # stock mínimo teórico
-
-            df.loc[idx, "cantidad_asignada_real"] = asignado
-
-        df.loc[grupo.index, "stock_bodega_restante"] = max(stock, 0)
+    # EXPANSION solo recibe si queda stock (sin stock corta el código);
+    # NUEVO consume el stock que haya y, si no hay, se le fuerza la demanda
+    # completa (stock mínimo teórico). El restante no baja de 0.
+    # Cubre también la asignación de EXPANSION sola: sus filas van antes que
+    # las NUEVO y se recorren con el mismo stock inicial.
+    especiales = np.flatnonzero(df["observacion"].isin(["EXPANSION", "NUEVO"]).to_numpy())
+    asignado, restante = _motor_asignacion(
+        df, especiales, forzado=(df["observacion"] == "NUEVO").to_numpy()
+    )
+    restante[especiales] = np.where(restante[especiales] < 0, 0, restante[especiales])
+    _asignar_columna(df, "cantidad_asignada_real", asignado)
+    _asignar_columna(df, "stock_bodega_restante", restante)
 
     # =========================
     # ICONOS EN OBSERVACIÓN
@@ -405,7 +574,7 @@ def get_reabastecimiento_avanzado(
         "OK": "OK"
     }
 
-    df["observacion"] = df["observacion"].map(icon_map).fillna(df["observacion"])    
+    df["observacion"] = df["observacion"].cat.rename_categories(icon_map)
 
     # =========================
     # SALIDA FINAL
@@ -430,5 +599,6 @@ def get_reabastecimiento_avanzado(
     result = df[columnas].sort_values(
         by=["region", "tienda", "d_marca", "c_barra"]
     )
+    result["observacion"] = result["observacion"].astype(object)
 
     return result
\ No newline at end of file
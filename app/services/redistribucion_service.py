@@ -1,87 +1,231 @@
 # app/services/redistribucion_service.py
 
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 
-from app.database import get_connection, date_subtract_days, date_format_convert
+from app.database import get_connection, date_format_convert
 from app.repositories import redistribucion_repository as repo
-from app.utils.text import _norm
+from app.utils.cache import register_cache
+from app.utils.text import _clasificar, _norm, _norm_series
+
+
+CLAVES_MATCH = ["region", "c_barra", "d_marca"]
+
+
+@register_cache
+@lru_cache(maxsize=1)
+def _load_config_maps():
+    """
+    Mapas de configuración (stock mínimo, región y tiendas fijas) más los
+    conjuntos en mayúsculas de referencias fijas y marcas multimarca. Se
+    construyen una vez por carga de la configuración y se descartan con
+    invalidate_caches().
+    """
+    _, referencias_fijas, marcas_multimarca, _, _ = repo.fetch_configuracion()
+    cfg_map, region_map, fija_set = repo.fetch_mapas_configuracion()
+    return (
+        cfg_map,
+        frozenset(r.upper() for r in referencias_fijas),
+        frozenset(m.upper() for m in marcas_multimarca),
+        region_map,
+        fija_set,
+    )
+
+
+def _categorias(serie):
+    """Valores distintos no nulos de ``serie`` (sus categorías si es category)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.categories
+    return pd.Index(serie.dropna().unique())
+
+
+def _emparejar_greedy(origen, destino):
+    """
+    Empareja orígenes y destinos de cada (region, c_barra, d_marca).
+
+    Dentro de cada clave, el origen con más excedente abastece primero al
+    destino con más faltante, y así sucesivamente: cada unidad se asigna una
+    sola vez. La salida tiene como máximo N + M - 1 filas por clave en vez
+    del producto N x M de un merge.
+
+    Se resuelve sin recorrer grupos en Python: la oferta y la demanda de cada
+    clave se ven como intervalos acumulados [inicio, fin) sobre una misma
+    recta, y cada tramo entre puntos de corte consecutivos corresponde a un
+    único par origen/destino.
+    """
+    # Aritmética sobre los ndarray: sin alineación de índices por operación
+    so = origen["stock_actual"].to_numpy()
+    sm_o = origen["stock_minimo"].to_numpy()
+    sa_d = destino["stock_actual"].to_numpy()
+    sm_d = destino["stock_minimo"].to_numpy()
+    origen = origen.assign(disponible=np.maximum(1, (so - sm_o) // 2))
+    destino = destino.assign(faltante=sm_d - sa_d)
+
+    # Id de clave común a ambos lados (los nulos también emparejan, como en merge)
+    claves = pd.concat([origen[CLAVES_MATCH], destino[CLAVES_MATCH]], ignore_index=True)
+    grupo = claves.groupby(
+        CLAVES_MATCH, dropna=False, sort=False, observed=True
+    ).ngroup().to_numpy()
+    n_grupos = grupo.max() + 1
+    origen["grupo"] = grupo[:len(origen)]
+    destino["grupo"] = grupo[len(origen):]
+
+    origen = origen.sort_values(["grupo", "disponible"], ascending=[True, False], kind="stable")
+    destino = destino.sort_values(["grupo", "faltante"], ascending=[True, False], kind="stable")
+
+    g_o = origen["grupo"].to_numpy()
+    g_d = destino["grupo"].to_numpy()
+    fin_o = origen.groupby("grupo", sort=False)["disponible"].cumsum().to_numpy()
+    fin_d = destino.groupby("grupo", sort=False)["faltante"].cumsum().to_numpy()
+
+    # Unidades transferibles por clave: min(oferta total, demanda total)
+    oferta = np.bincount(g_o, weights=origen["disponible"].to_numpy(), minlength=n_grupos)
+    demanda = np.bincount(g_d, weights=destino["faltante"].to_numpy(), minlength=n_grupos)
+    total = np.minimum(oferta, demanda).astype(np.int64)
+
+    # Puntos de corte: el 0 de cada clave y cada fin acumulado por debajo del total.
+    # Se codifican como grupo * escala + posición para ordenarlos de una vez.
+    escala = int(max(fin_o.max(), fin_d.max())) + 1
+    cortes_g = np.concatenate([np.arange(n_grupos), g_o, g_d])
+    cortes_x = np.concatenate([np.zeros(n_grupos, dtype=np.int64), fin_o, fin_d])
+    validos = cortes_x < total[cortes_g]
+    codigos = np.unique(cortes_g[validos] * escala + cortes_x[validos])
+
+    g_tramo = codigos // escala
+    inicio = codigos % escala
+    siguiente_mismo_grupo = np.append(g_tramo[1:] == g_tramo[:-1], False)
+    fin = np.where(siguiente_mismo_grupo, np.append(inicio[1:], 0), total[g_tramo])
+
+    # Origen/destino dueño de cada tramo: primer intervalo que termina después del inicio
+    idx_o = np.searchsorted(g_o * escala + fin_o, codigos, side="right")
+    idx_d = np.searchsorted(g_d * escala + fin_d, codigos, side="right")
+
+    # Solo se toman las columnas de salida (sobre códigos si son category)
+    return pd.DataFrame({
+        "region": origen["region"].iloc[idx_o].to_numpy(),
+        "c_barra": origen["c_barra"].iloc[idx_o].to_numpy(),
+        "d_marca": origen["d_marca"].iloc[idx_o].to_numpy(),
+        "tienda_origen": origen["tienda_clean"].iloc[idx_o].to_numpy(),
+        "tienda_destino": destino["tienda_clean"].iloc[idx_d].to_numpy(),
+        "cantidad_sugerida": (fin - inicio).astype(int),
+    })
 
 
 def get_redistribucion_regional(dias=30, ventas_min=1, tienda_origen=None):
 
-    with get_connection() as conn:
-        df_cfg, referencias_fijas, marcas_multimarca, codigos_excluidos, config_tiendas = \
-            repo.fetch_configuracion(conn)
+    cfg_map, ref_set, marca_set, region_map, fija_set = _load_config_maps()
 
-        fecha_desde = date_subtract_days(dias)
+    with get_connection() as conn:
         fecha_col = date_format_convert("h.f_sistema")
 
-        ventas = repo.fetch_ventas(conn, fecha_col, fecha_desde)
+        ventas = repo.fetch_ventas(conn, fecha_col, dias)
         existencias = repo.fetch_existencias(conn)
 
-    # ---------------- NORMALIZACIÓN ----------------
-    cfg_map = {
-        str(r["tipo"]).lower(): int(r["cantidad"])
-        for _, r in df_cfg.iterrows() if pd.notna(r["cantidad"])
-    }
-
-    config_tiendas["clean_norm"] = config_tiendas["clean_name"].fillna("").apply(_norm)
-    region_map = dict(zip(config_tiendas["clean_norm"], config_tiendas["region"]))
-    fija_set = set(
-        config_tiendas.loc[config_tiendas["fija"] == 1, "clean_name"]
-        .apply(_norm)
-    )
+    # Sin existencias no hay orígenes ni destinos; sin ventas tampoco hay
+    # destinos, salvo que ventas_min <= 0 admita tiendas sin venta
+    if existencias.empty or (ventas.empty and ventas_min > 0):
+        return pd.DataFrame()
 
+    # ---------------- NORMALIZACIÓN ----------------
     for df in (ventas, existencias):
-        df["tienda_norm"] = df["tienda_clean"].fillna("").apply(_norm)
-        df["region"] = df["tienda_norm"].map(region_map).fillna("SIN REGION")
+        # tienda_clean llega como category: se normalizan solo sus categorías
+        df["tienda_norm"] = _norm_series(df["tienda_clean"])
 
-    ventas["ventas_periodo"] = ventas["ventas_periodo"].fillna(0).astype(int)
-    existencias["stock_actual"] = existencias["stock_actual"].fillna(0).astype(int)
+    ventas["ventas_periodo"] = ventas["ventas_periodo"].fillna(0).astype(np.int32)
+    existencias["stock_actual"] = existencias["stock_actual"].fillna(0).astype(np.int32)
 
     # ---------------- STOCK MÍNIMO ----------------
-    ref_set = set(r.upper() for r in referencias_fijas)
-    marca_set = set(m.upper() for m in marcas_multimarca)
-
-    def stock_min(c, m):
-        c, m = str(c).upper(), str(m).upper()
-        if c in ref_set:
-            return cfg_map.get("fijo_normal", 5)
-        if m in marca_set:
-            return cfg_map.get("multimarca", 2)
-        if "JGL" in c or "JGL" in m:
-            return cfg_map.get("jgl", 3)
-        if "JGM" in c or "JGM" in m:
-            return cfg_map.get("jgm", 3)
-        return cfg_map.get("default", cfg_map.get("general", 4))
-
-    existencias["stock_minimo"] = existencias.apply(
-        lambda r: stock_min(r["c_barra"], r["d_marca"]), axis=1
-    )
+    # c_barra y d_marca son category: cada regla se evalúa una vez por valor
+    # distinto y se expande a las filas por código
+    c_ref, c_jgl, c_jgm = _clasificar(existencias["c_barra"], [
+        lambda t: t.isin(ref_set),
+        lambda t: t.str.contains("JGL", regex=False),
+        lambda t: t.str.contains("JGM", regex=False),
+    ])
+    m_multi, m_jgl, m_jgm = _clasificar(existencias["d_marca"], [
+        lambda t: t.isin(marca_set),
+        lambda t: t.str.contains("JGL", regex=False),
+        lambda t: t.str.contains("JGM", regex=False),
+    ])
+
+    condiciones = [c_ref, m_multi, c_jgl | m_jgl, c_jgm | m_jgm]
+    valores = [
+        cfg_map.get("fijo_normal", 5),
+        cfg_map.get("multimarca", 2),
+        cfg_map.get("jgl", 3),
+        cfg_map.get("jgm", 3),
+    ]
+    existencias["stock_minimo"] = np.select(
+        condiciones, valores,
+        default=cfg_map.get("default", cfg_map.get("general", 4))
+    ).astype(np.int32)
 
     # ---------------- MERGE ----------------
+    # Claves como category con las mismas categorías en ambos lados: el
+    # groupby y el cruce trabajan sobre códigos enteros en vez de strings.
+    # Las categorías comunes salen de las de cada lado, sin recorrer filas
+    # cuando la columna ya es category.
+    claves = ["tienda_norm", "c_barra", "d_marca"]
+    for col in claves:
+        tipo = pd.CategoricalDtype(
+            _categorias(ventas[col]).append(_categorias(existencias[col])).unique()
+        )
+        ventas[col] = ventas[col].astype(tipo)
+        existencias[col] = existencias[col].astype(tipo)
+
+    # Región por tienda normalizada, resuelta una vez por categoría (solo
+    # las existencias la necesitan: es clave del emparejamiento)
+    regiones = pd.Series(existencias["tienda_norm"].cat.categories).map(
+        region_map
+    ).fillna("SIN REGION")
+    codigos_region, nombres_region = pd.factorize(regiones)
+    existencias["region"] = pd.Categorical.from_codes(
+        codigos_region[existencias["tienda_norm"].cat.codes.to_numpy()],
+        categories=nombres_region
+    )
+
+    # sort=False: el agregado solo se consulta por posición, su orden no importa
     ventas_agg = ventas.groupby(
-        ["tienda_norm", "c_barra", "d_marca"],
-        as_index=False
+        claves,
+        as_index=False,
+        observed=True,
+        sort=False
     )["ventas_periodo"].sum()
 
-    df = existencias.merge(
-        ventas_agg,
-        on=["tienda_norm", "c_barra", "d_marca"],
-        how="left"
-    ).fillna({"ventas_periodo": 0})
+    # LEFT JOIN como búsqueda posicional sobre el agregado (claves únicas):
+    # sin merge, y las existencias sin ventas quedan en 0
+    posicion = pd.MultiIndex.from_frame(ventas_agg[claves]).get_indexer(
+        pd.MultiIndex.from_frame(existencias[claves])
+    )
+    # Un 0 al final: la posición -1 (sin ventas) lo toma directamente
+    ventas_periodo = np.append(ventas_agg["ventas_periodo"].to_numpy(), 0)
+    # Se agrega en el mismo frame: assign copiaría todas las existencias
+    existencias["ventas_periodo"] = ventas_periodo[posicion]
+    df = existencias
 
     # ---------------- ORIGEN / DESTINO ----------------
-    origen = df[
-        (df["stock_actual"] > df["stock_minimo"]) &
-        (df["ventas_periodo"] == 0) &
-        (~df["tienda_norm"].isin(fija_set))
+    # Máscaras sobre los ndarray (sin Series intermedias ni alineación)
+    stock = df["stock_actual"].to_numpy()
+    minimo = df["stock_minimo"].to_numpy()
+    vendido = df["ventas_periodo"].to_numpy()
+    # Tienda fija resuelta por categoría y expandida por código (-1 -> False)
+    tiendas = df["tienda_norm"]
+    es_fija = np.append(tiendas.cat.categories.isin(fija_set), False)[
+        tiendas.cat.codes.to_numpy()
     ]
 
-    destino = df[
-        (df["stock_actual"] < df["stock_minimo"]) &
-        (df["ventas_periodo"] >= ventas_min)
-    ]
+    origen = df.iloc[np.flatnonzero(
+        (stock > minimo) &
+        (vendido == 0) &
+        ~es_fija
+    )]
+
+    destino = df.iloc[np.flatnonzero(
+        (stock < minimo) &
+        (vendido >= ventas_min)
+    )]
 
     if tienda_origen:
         t_norm = _norm(tienda_origen)
@@ -92,36 +236,22 @@ def get_redistribucion_regional(dias=30, ventas_min=1, tienda_origen=None):
         destino = destino[destino["region"] == region]
 
     # ---------------- MATCH ----------------
-    merged = origen.merge(
-        destino,
-        on=["region", "c_barra", "d_marca"],
-        suffixes=("_origen", "_destino")
-    )
-
-    if merged.empty:
+    if origen.empty or destino.empty:
         return pd.DataFrame()
 
-    merged["cantidad_sugerida"] = merged.apply(
-        lambda r: max(
-            1,
-            min(
-                (r["stock_actual_origen"] - r["stock_minimo_origen"]) // 2,
-                (r["stock_minimo_destino"] - r["stock_actual_destino"])
-            )
-        ),
-        axis=1
-    )
+    # Solo claves con oferta y demanda a la vez: las demás no generan
+    # tramos en el emparejamiento y solo agrandan el ordenamiento
+    claves_o = pd.MultiIndex.from_frame(origen[CLAVES_MATCH])
+    claves_d = pd.MultiIndex.from_frame(destino[CLAVES_MATCH])
+    origen = origen[claves_o.isin(claves_d)]
+    destino = destino[claves_d.isin(claves_o)]
+
+    if origen.empty:
+        return pd.DataFrame()
 
-    final = merged[merged["cantidad_sugerida"] > 0].copy()
+    final = _emparejar_greedy(origen, destino)
 
     if final.empty:
         return pd.DataFrame()
 
-    return final[[
-        "region", "c_barra", "d_marca",
-        "tienda_clean_origen", "tienda_clean_destino",
-        "cantidad_sugerida"
-    ]].rename(columns={
-        "tienda_clean_origen": "tienda_origen",
-        "tienda_clean_destino": "tienda_destino"
-    })
\ No newline at end of file
+    return final
@@ -0,0 +1,23 @@
+# app/utils/cache.py
+
+"""
+Registro de cachés en memoria del proceso.
+
+Las funciones cacheadas con lru_cache se registran aquí para poder
+vaciarlas todas juntas cuando cambian los datos (carga de CSV o
+endpoints de configuración).
+"""
+
+_caches_registradas = []
+
+
+def register_cache(func):
+    """Registra una función con cache_clear() para invalidate_caches()."""
+    _caches_registradas.append(func)
+    return func
+
+
+def invalidate_caches():
+    """Vacía todas las cachés registradas."""
+    for func in _caches_registradas:
+        func.cache_clear()
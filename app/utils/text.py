@@ -1,15 +1,93 @@
 # app/utils/text.py
 
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 import unicodedata
 
+class _SinCombinantes(dict):
+    """
+    Tabla para str.translate que elimina las marcas combinantes (acentos
+    tras NFKD). Cada código se clasifica la primera vez que aparece; luego
+    la búsqueda la resuelve translate en C.
+    """
+
+    def __missing__(self, codigo):
+        valor = None if unicodedata.combining(chr(codigo)) else codigo
+        self[codigo] = valor
+        return valor
+
+
+_SIN_COMBINANTES = _SinCombinantes()
+
+# Memoizado: los mismos nombres de tienda/marca se normalizan en cada
+# petición. typed=True para que 1 y 1.0 no compartan entrada ("1" / "1.0").
+@lru_cache(maxsize=4096, typed=True)
 def _norm(s):
     """Normaliza strings: None->'', quita acentos, strip, lower, colapsa espacios."""
     if pd.isna(s):
         return ""
     s = str(s)
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    # En ASCII NFKD no cambia nada y no hay marcas combinantes que quitar
+    if not s.isascii():
+        s = unicodedata.normalize("NFKD", s)
+        s = s.translate(_SIN_COMBINANTES)
     s = s.strip().lower()
     s = " ".join(s.split())
-    return s
\ No newline at end of file
+    return s
+
+def _norm_series(serie):
+    """
+    Aplica _norm a una Serie completa.
+
+    Normaliza solo los valores únicos y luego mapea el resultado, así el
+    costo depende de la cantidad de tiendas/marcas distintas y no del
+    número de filas. El resultado es idéntico a serie.apply(_norm).
+
+    Si la Serie es category se normalizan directamente sus categorías y se
+    indexa por código (los nulos, código -1, quedan en "").
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        normalizadas = np.array(
+            [_norm(c) for c in serie.cat.categories] + [""], dtype=object
+        )
+        return pd.Series(
+            normalizadas[serie.cat.codes.to_numpy()],
+            index=serie.index, name=serie.name
+        )
+    unicos = pd.unique(serie)
+    return serie.map(dict(zip(unicos, map(_norm, unicos))))
+
+def _mayusculas_series(serie):
+    """
+    Equivale a serie.astype(str).str.upper(), pero convierte cada valor
+    distinto una sola vez y expande el resultado por código entero. Los
+    nulos se convierten por fila ("NONE" / "NAN", según el nulo).
+    """
+    codigos, unicos = pd.factorize(serie)
+    textos = np.array([str(u).upper() for u in unicos] + [""], dtype=object)
+    resultado = textos[codigos]
+    nulos = codigos < 0
+    resultado[nulos] = serie[nulos].astype(str).str.upper().to_numpy()
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+def _clasificar(serie, reglas):
+    """
+    Evalúa cada regla (Serie de texto en mayúsculas -> máscara) una sola vez
+    por valor distinto de ``serie`` y expande el resultado a todas las filas
+    por código entero. El texto es str(valor).upper(); los nulos se evalúan
+    por fila porque None y NaN dan textos distintos ("NONE" / "NAN").
+    """
+    codigos, unicos = pd.factorize(serie)
+    textos = pd.Series(unicos, dtype=object).astype(str).str.upper()
+    nulos = codigos < 0
+    textos_nulos = serie[nulos].astype(str).str.upper()
+
+    resultados = []
+    for regla in reglas:
+        mascara = np.empty(len(serie), dtype=bool)
+        mascara[~nulos] = regla(textos).to_numpy()[codigos[~nulos]]
+        mascara[nulos] = regla(textos_nulos).to_numpy()
+        resultados.append(mascara)
+    return resultados
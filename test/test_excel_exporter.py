@@ -0,0 +1,140 @@
+# test/test_excel_exporter.py
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from app.reports import excel_exporter
+from app.reports.excel_exporter import exportar_excel_formateado
+
+MOTORES = ["openpyxl", "xlsxwriter", "xml"]
+
+
+def _datos(n, tiendas, semilla=7):
+    """Reporte sintético con texto repetido, nulos y números mezclados."""
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "tienda": rng.choice(tiendas, n),
+        "c_barra": [f"7701{i:06d}" for i in range(n)],
+        "d_marca": rng.choice(["NIKE", "PUMA", 'A "quoted" brand'], n),
+        "color": rng.choice(["NEGRO", "AZUL", None, "ROJO/ÑANDÚ"], n),
+        "cantidad_a_despachar": rng.integers(0, 40, n),
+        "observacion": rng.choice(["", "Urgente", "Revisar <talla>", None], n),
+        "precio": np.where(rng.random(n) < .1, np.nan, rng.random(n) * 1000),
+    })
+
+
+# Nombres que exigen saneamiento: caracteres inválidos, largo y duplicado
+# sin distinguir mayúsculas
+TIENDAS = ["ENVIGADO", "Envigado", "CALI / VALLE", "MEDELLIN CENTRO LARGO NOMBRE TIENDA XX"]
+
+
+def _exportar(df, archivo, tipo_formato, engine):
+    if engine == "xlsxwriter":
+        pytest.importorskip("xlsxwriter")
+    with contextlib.redirect_stdout(io.StringIO()):
+        exportar_excel_formateado(df, archivo, "Reporte Prueba", tipo_formato, engine=engine)
+    return load_workbook(archivo)
+
+
+def _valor(v):
+    # Vacío y "" son la misma celda; 3.0 y 3 el mismo número
+    if v == "":
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _contenido(ws):
+    return [tuple(_valor(v) for v in fila) for fila in ws.iter_rows(values_only=True)]
+
+
+def _comparar(esperado, obtenido):
+    assert obtenido.sheetnames == esperado.sheetnames
+    for nombre in esperado.sheetnames:
+        a, b = esperado[nombre], obtenido[nombre]
+        assert _contenido(b) == _contenido(a), nombre
+        assert sorted(map(str, b.merged_cells.ranges)) == sorted(map(str, a.merged_cells.ranges)), nombre
+        assert b.freeze_panes == a.freeze_panes, nombre
+
+
+@pytest.fixture(scope="module")
+def df_pequeno():
+    """Pocas filas por tienda: todo se serializa en el proceso actual."""
+    return _datos(40, TIENDAS)
+
+
+@pytest.mark.parametrize("tipo_formato", ["general", "picking"])
+@pytest.mark.parametrize("engine", MOTORES)
+def test_motores_coinciden_con_openpyxl(tmp_path, df_pequeno, tipo_formato, engine):
+    esperado = _exportar(df_pequeno, tmp_path / "base.xlsx", tipo_formato, "openpyxl")
+    obtenido = _exportar(df_pequeno, tmp_path / f"{engine}.xlsx", tipo_formato, engine)
+
+    _comparar(esperado, obtenido)
+
+
+def test_nombres_de_hoja_saneados(tmp_path, df_pequeno):
+    wb = _exportar(df_pequeno, tmp_path / "general.xlsx", "general", "openpyxl")
+
+    assert wb.sheetnames == ["CALI _ VALLE", "ENVIGADO", "Envigado1", "MEDELLIN CENTRO LARGO NOM"]
+
+
+def test_picking_cabecera_y_paneles(tmp_path, df_pequeno):
+    wb = _exportar(df_pequeno, tmp_path / "picking.xlsx", "picking", "openpyxl")
+    ws = wb["ENVIGADO"]
+
+    assert "A1:F2" in map(str, ws.merged_cells.ranges)
+    assert ws.freeze_panes == "A11"
+    assert ws["B10"].value == "Cod.Barras"
+
+
+@pytest.mark.parametrize("tipo_formato", ["general", "picking"])
+def test_xml_en_paralelo_coincide_con_openpyxl(tmp_path, monkeypatch, tipo_formato):
+    # Suficientes filas y varias tiendas para repartir las hojas entre
+    # procesos; cada hoja toma su parte de sharedStrings por posición
+    df = _datos(excel_exporter._MIN_FILAS_PARALELO, TIENDAS, semilla=11)
+    # El índice original no es posicional: el motor debe reindexar
+    df.index = df.index * 3 + 5
+
+    pools = []
+
+    class _Pool(excel_exporter.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(kwargs.get("max_workers"))
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(excel_exporter, "ProcessPoolExecutor", _Pool)
+    monkeypatch.setattr(excel_exporter.os, "cpu_count", lambda: 2)
+
+    esperado = _exportar(df, tmp_path / "base.xlsx", tipo_formato, "openpyxl")
+    obtenido = _exportar(df, tmp_path / "xml.xlsx", tipo_formato, "xml")
+
+    assert pools == [2]
+    _comparar(esperado, obtenido)
+
+
+def test_error_en_hoja_no_deja_temporales(tmp_path, monkeypatch, df_pequeno):
+    from openpyxl.worksheet._writer import ALL_TEMP_FILES
+
+    original = excel_exporter._crear_hoja_general
+    llamadas = []
+
+    def _falla_en_la_segunda(ws, df, nombre_reporte):
+        llamadas.append(nombre_reporte)
+        if len(llamadas) == 2:
+            raise RuntimeError("fallo simulado")
+        original(ws, df, nombre_reporte)
+
+    monkeypatch.setattr(excel_exporter, "_crear_hoja_general", _falla_en_la_segunda)
+    temporales = list(ALL_TEMP_FILES)
+
+    with pytest.raises(RuntimeError):
+        _exportar(df_pequeno, tmp_path / "general.xlsx", "general", "openpyxl")
+
+    assert ALL_TEMP_FILES == temporales
+    assert not (tmp_path / "general.xlsx").exists()
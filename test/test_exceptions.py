@@ -0,0 +1,72 @@
+# test/test_exceptions.py
+
+import traceback
+
+import pytest
+
+from app.exceptions import (
+    BaseAppException,
+    DB_CONNECTION_FAILED,
+    DB_TRANSACTION_FAILED,
+    FORBIDDEN,
+    UNAUTHORIZED,
+    ForbiddenError,
+    UnauthorizedError,
+    raise_shared,
+)
+
+SINGLETONS = (UNAUTHORIZED, FORBIDDEN, DB_CONNECTION_FAILED, DB_TRANSACTION_FAILED)
+
+
+def _lanzar(singleton, causa):
+    try:
+        raise causa
+    except Exception as exc:
+        raise_shared(singleton, exc)
+
+
+@pytest.mark.parametrize("singleton", SINGLETONS)
+def test_singleton_payload_igual_a_instancia_nueva(singleton):
+    nueva = type(singleton)()
+
+    assert singleton.to_dict() == nueva.to_dict()
+    assert singleton.status_code == nueva.status_code
+
+
+@pytest.mark.parametrize("singleton", SINGLETONS)
+def test_singleton_traceback_no_se_acumula(singleton):
+    largos = []
+    for _ in range(3):
+        with pytest.raises(BaseAppException) as info:
+            _lanzar(singleton, ValueError("causa"))
+        largos.append(len(traceback.extract_tb(info.value.__traceback__)))
+
+    assert len(set(largos)) == 1
+
+
+def test_singleton_encadena_causa_de_cada_raise():
+    for mensaje in ("primera", "segunda"):
+        with pytest.raises(UnauthorizedError) as info:
+            _lanzar(UNAUTHORIZED, KeyError(mensaje))
+
+        assert info.value is not UNAUTHORIZED
+        assert info.value.__cause__.args == (mensaje,)
+        assert info.value.to_dict() == UNAUTHORIZED.to_dict()
+
+
+def test_singleton_no_arrastra_causa_al_siguiente_raise():
+    with pytest.raises(UnauthorizedError):
+        _lanzar(UNAUTHORIZED, KeyError("secreto"))
+
+    with pytest.raises(UnauthorizedError) as info:
+        raise_shared(UNAUTHORIZED)
+
+    assert info.value.__cause__ is None
+    assert info.value.__context__ is None
+    assert UNAUTHORIZED.__cause__ is None
+    assert UNAUTHORIZED.__traceback__ is None
+
+
+def test_forbidden_singleton_conserva_status_403():
+    assert isinstance(FORBIDDEN, ForbiddenError)
+    assert FORBIDDEN.status_code == 403
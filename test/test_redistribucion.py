@@ -0,0 +1,158 @@
+# test/test_redistribucion.py
+
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import redistribucion_service as servicio
+
+COLUMNAS = ["region", "c_barra", "d_marca", "tienda_origen", "tienda_destino", "cantidad_sugerida"]
+
+
+def _filas(resultado):
+    """Filas del resultado como tuplas ordenadas (el orden no es contrato)."""
+    return sorted(resultado[COLUMNAS].itertuples(index=False, name=None))
+
+
+def _lado(filas):
+    """origen/destino ya clasificados, como los recibe _emparejar_greedy."""
+    return pd.DataFrame(
+        filas,
+        columns=["region", "c_barra", "d_marca", "tienda_clean", "stock_actual", "stock_minimo"],
+    )
+
+
+# ==========================================
+# EMPAREJAMIENTO DIRECTO
+# ==========================================
+
+def test_greedy_reparte_excedente_desigual():
+    # Excedentes: A max(1, (20-4)//2) = 8, B (10-4)//2 = 3
+    origen = _lado([
+        ("R1", "X", "M", "A", 20, 4),
+        ("R1", "X", "M", "B", 10, 4),
+    ])
+    # Faltantes: C 4, E 3 -> la demanda (7) se cubre solo con A
+    destino = _lado([
+        ("R1", "X", "M", "E", 1, 4),
+        ("R1", "X", "M", "C", 0, 4),
+    ])
+
+    assert _filas(servicio._emparejar_greedy(origen, destino)) == [
+        ("R1", "X", "M", "A", "C", 4),
+        ("R1", "X", "M", "A", "E", 3),
+    ]
+
+
+def test_greedy_un_destino_abastecido_por_varios_origenes():
+    # Excedentes A 3, B 4: se agota primero el mayor (B) y A completa
+    origen = _lado([
+        ("R1", "X", "M", "A", 10, 4),
+        ("R1", "X", "M", "B", 12, 4),
+    ])
+    destino = _lado([("R1", "X", "M", "C", 0, 5)])
+
+    assert _filas(servicio._emparejar_greedy(origen, destino)) == [
+        ("R1", "X", "M", "A", "C", 1),
+        ("R1", "X", "M", "B", "C", 4),
+    ]
+
+
+def test_greedy_excedente_minimo_es_una_unidad():
+    # (5 - 4) // 2 = 0, pero todo origen ofrece al menos 1
+    origen = _lado([("R1", "X", "M", "A", 5, 4)])
+    destino = _lado([("R1", "X", "M", "C", 0, 4)])
+
+    assert _filas(servicio._emparejar_greedy(origen, destino)) == [
+        ("R1", "X", "M", "A", "C", 1),
+    ]
+
+
+def test_greedy_no_cruza_claves_distintas():
+    origen = _lado([
+        ("R1", "X", "M", "A", 20, 4),
+        ("R1", "Y", "M", "A", 30, 4),
+    ])
+    destino = _lado([
+        ("R1", "X", "M", "C", 2, 4),
+        ("R2", "X", "M", "D", 0, 4),
+    ])
+
+    assert _filas(servicio._emparejar_greedy(origen, destino)) == [
+        ("R1", "X", "M", "A", "C", 2),
+    ]
+
+
+# ==========================================
+# SERVICIO COMPLETO (BD SUSTITUIDA)
+# ==========================================
+
+def _con_categorias(df):
+    """Como los entrega el repositorio: texto repetido en category."""
+    for col in ("tienda_clean", "c_barra", "d_marca"):
+        df[col] = df[col].astype("category")
+    return df
+
+
+@pytest.fixture
+def redistribucion(monkeypatch):
+    existencias = _con_categorias(pd.DataFrame({
+        "tienda_clean": ["Tienda A", "Tienda B", "Tienda C", "Tienda E", "Tienda D",
+                         "Tienda A", "Tienda A", "Tienda C"],
+        "c_barra": ["X", "X", "X", "X", "X", "Y", "Z", "Z"],
+        "d_marca": ["M"] * 8,
+        # Tienda C / Z sin saldo registrado (NULL -> 0)
+        "stock_actual": [20, 10, 0, 1, np.nan, 30, 10, np.nan],
+    }))
+    ventas = _con_categorias(pd.DataFrame({
+        "tienda_clean": ["Tienda C", "Tienda E", "Tienda D", "Tienda C"],
+        "c_barra": ["X", "X", "X", "Z"],
+        "d_marca": ["M"] * 4,
+        "ventas_periodo": [2, 1, 5, 1],
+    }))
+    region_map = {
+        "tienda a": "R1", "tienda b": "R1", "tienda c": "R1",
+        "tienda e": "R1", "tienda d": "R2",
+    }
+
+    monkeypatch.setattr(servicio, "get_connection", nullcontext)
+    monkeypatch.setattr(servicio.repo, "fetch_ventas", lambda conn, fecha_col, dias: ventas.copy())
+    monkeypatch.setattr(servicio.repo, "fetch_existencias", lambda conn: existencias.copy())
+    monkeypatch.setattr(
+        servicio, "_load_config_maps",
+        lambda: ({"default": 4}, frozenset(), frozenset(), region_map, frozenset()),
+    )
+    return servicio.get_redistribucion_regional
+
+
+def test_servicio_empareja_por_region_y_codigo(redistribucion):
+    # X: A (8) cubre C (4) y E (3); B sobra. D está en otra región.
+    # Y: solo excedente, sin faltantes -> sin filas.
+    # Z: C sin saldo (NaN -> 0) recibe 3 de A ((10-4)//2).
+    assert _filas(redistribucion()) == [
+        ("R1", "X", "M", "Tienda A", "Tienda C", 4),
+        ("R1", "X", "M", "Tienda A", "Tienda E", 3),
+        ("R1", "Z", "M", "Tienda A", "Tienda C", 3),
+    ]
+
+
+def test_servicio_filtra_por_tienda_origen(redistribucion):
+    resultado = redistribucion(tienda_origen="  TIENDA   b ")
+
+    # B ofrece X, pero A ya no compite: solo se consideran orígenes de B
+    assert _filas(resultado) == [
+        ("R1", "X", "M", "Tienda B", "Tienda C", 3),
+    ]
+
+
+def test_servicio_ventas_min_excluye_destinos(redistribucion):
+    # Con ventas_min=2 solo C (X, 2 ventas) sigue siendo destino
+    assert _filas(redistribucion(ventas_min=2)) == [
+        ("R1", "X", "M", "Tienda A", "Tienda C", 4),
+    ]
+
+
+def test_servicio_sin_destinos_devuelve_vacio(redistribucion):
+    assert redistribucion(ventas_min=100).empty